@@ -0,0 +1,315 @@
+"""Общие средства для сценариев измерения производительности.
+
+Сценарии запускаются из любого каталога обычным интерпретатором Python 3,
+LibreOffice для них не требуется. Встроенные модули шаблонов загружаются
+из рабочего каталога репозитория или из указанной ревизии git, что
+позволяет сравнить результаты до и после изменений.
+
+"""
+
+import importlib.util
+import itertools
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+from xml.sax.saxutils import escape
+
+try:
+    import uno
+except ImportError:
+    # Модуль config использует uno только при сохранении параметров
+    # в документ, которое сценариями не выполняется.
+    sys.modules["uno"] = types.ModuleType("uno")
+
+# Корневой каталог репозитория
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Генерируемые компоненты: буквенная часть обозначения, тип, значения
+COMP_TYPES = (
+    ("C", "Конденсатор {Конденсаторы}", ("100n", "4u7", "10p", "2.2u", "1n", "47")),
+    ("R", "Резистор {Резисторы}", ("10k", "4k7", "1R5", "R33", "100", "1M", "2.2k")),
+    ("L", "Дроссель {Дроссели}", ("10u", "4u7", "100n", "1m", "2.2")),
+    ("DA", "Микросхема {Микросхемы}", ("LM358", "NE555", "TL431")),
+    ("XP", "Вилка {Вилки}", ("PLS-2", "PLS-4", "PLD-10 R")),
+    ("VD", "", ("1N4148", "BAT54")),
+)
+
+# Счётчик для получения уникальных имён загружаемых модулей
+_moduleCounter = itertools.count()
+
+
+class _FileAccess():
+    """Доступ к файлам документа: файл параметров отсутствует."""
+
+    def exists(self, url):
+        return False
+
+
+class _ServiceManager():
+
+    def createInstance(self, name):
+        return _FileAccess()
+
+
+class _ComponentContext():
+
+    ServiceManager = _ServiceManager()
+
+
+class _Document():
+
+    def __init__(self, runtimeUid):
+        self.RuntimeUID = runtimeUid
+
+
+class ScriptContext():
+    """Контекст сценария для работы модулей шаблона вне LibreOffice.
+
+    Предоставляет лишь то, что требуется модулям при инициализации
+    и загрузке параметров. Документ не содержит файла параметров,
+    поэтому используются значения по умолчанию.
+
+    """
+
+    def __init__(self, runtimeUid):
+        self._document = _Document(runtimeUid)
+        self._context = _ComponentContext()
+
+    def getDocument(self):
+        return self._document
+
+    def getComponentContext(self):
+        return self._context
+
+
+def _quote(text):
+    """Заключить значение в кавычки, если это необходимо."""
+    if text == "" or any(c in text for c in ' ()"'):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+def _generateComponents(rnd, compCount):
+    """Сформировать данные случайных компонентов.
+
+    Возвращаемое значение (list) -- список кортежей (обозначение,
+        значение, буквенная часть обозначения, поля), где поля -- список
+        пар (название, значение).
+
+    """
+    comps = []
+    counters = {}
+    for index in range(compCount):
+        prefix, compType, values = rnd.choice(COMP_TYPES)
+        counters[prefix] = counters.get(prefix, 0) + 1
+        value = rnd.choice(values)
+        fields = []
+        if compType:
+            fields.append(("Тип", compType))
+        fields.append(("Наименование", "Part-{} {}".format(prefix, value)))
+        if rnd.random() < 0.3:
+            fields.append(("Документ", "ТУ {}".format(rnd.randrange(3))))
+        fields.append(("Примечание", ""))
+        comps.append(("{}{}".format(prefix, counters[prefix]), value, prefix, fields))
+    return comps
+
+def _formatNet(comps):
+    """Сформировать список цепей в формате S-выражений."""
+    lines = [
+        "(export (version D)",
+        "  (design",
+        "    (source /home/user/proj/proj.sch)",
+        "    (tool \"Eeschema 5.1.5\")",
+        "    (sheet (number 1) (name /) (tstamps /)",
+        "      (title_block",
+        "        (title \"Плата управления\")",
+        "        (company \"\")",
+        "        (rev 1)",
+        "        (date 2020-01-01)",
+        "        (source proj.sch)",
+        "        (comment (number 1) (value \"АБВГ.123456.001Э3\")))))",
+        "  (components",
+    ]
+    for index, (ref, value, prefix, fields) in enumerate(comps):
+        lines.append("    (comp (ref {})".format(ref))
+        lines.append("      (value {})".format(_quote(value)))
+        lines.append("      (footprint Lib:FP_{})".format(prefix))
+        lines.append("      (datasheet ~)")
+        lines.append("      (fields")
+        for fieldName, fieldValue in fields:
+            lines.append(
+                "        (field (name {}) {})".format(fieldName, _quote(fieldValue))
+            )
+        lines[-1] += ")"
+        lines.append(
+            "      (libsource (lib Device) (part {}) (description \"Part\"))".format(prefix)
+        )
+        lines.append("      (sheetpath (names /) (tstamps /))")
+        lines.append("      (tstamp 5E0F{:04X}))".format(index % 65536))
+    lines[-1] += ")"
+    lines.append("  (nets")
+    for index in range(max(1, len(comps) // 2)):
+        lines.append(
+            "    (net (code {}) (name {})".format(
+                index + 1,
+                _quote("Net-(R{}-Pad1)".format(index))
+            )
+        )
+        lines.append("      (node (ref R{}) (pin 1))".format(index + 1))
+        lines.append("      (node (ref C{}) (pin 2)))".format(index + 1))
+    lines[-1] += "))"
+    return lines
+
+def _formatXml(comps):
+    """Сформировать список цепей в формате XML."""
+    attr = lambda text: escape(text, {'"': "&quot;"})
+    lines = [
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>",
+        "<export version=\"D\">",
+        "  <design>",
+        "    <source>/home/user/proj/proj.sch</source>",
+        "    <tool>Eeschema 5.1.5</tool>",
+        "    <sheet number=\"1\" name=\"/\" tstamps=\"/\">",
+        "      <title_block>",
+        "        <title>Плата управления</title>",
+        "        <company/>",
+        "        <rev>1</rev>",
+        "        <date>2020-01-01</date>",
+        "        <source>proj.sch</source>",
+        "        <comment number=\"1\" value=\"АБВГ.123456.001Э3\"/>",
+        "      </title_block>",
+        "    </sheet>",
+        "  </design>",
+        "  <components>",
+    ]
+    for index, (ref, value, prefix, fields) in enumerate(comps):
+        lines.append("    <comp ref=\"{}\">".format(attr(ref)))
+        lines.append("      <value>{}</value>".format(escape(value)))
+        lines.append("      <footprint>Lib:FP_{}</footprint>".format(prefix))
+        lines.append("      <datasheet>~</datasheet>")
+        lines.append("      <fields>")
+        for fieldName, fieldValue in fields:
+            if fieldValue:
+                lines.append(
+                    "        <field name=\"{}\">{}</field>".format(
+                        attr(fieldName),
+                        escape(fieldValue)
+                    )
+                )
+            else:
+                lines.append("        <field name=\"{}\"/>".format(attr(fieldName)))
+        lines.append("      </fields>")
+        lines.append(
+            "      <libsource lib=\"Device\" part=\"{}\" description=\"Part\"/>".format(prefix)
+        )
+        lines.append("      <sheetpath names=\"/\" tstamps=\"/\"/>")
+        lines.append("      <tstamp>5E0F{:04X}</tstamp>".format(index % 65536))
+        lines.append("    </comp>")
+    lines.append("  </components>")
+    lines.append("  <nets>")
+    for index in range(max(1, len(comps) // 2)):
+        lines.append(
+            "    <net code=\"{}\" name=\"{}\">".format(
+                index + 1,
+                attr("Net-(R{}-Pad1)".format(index))
+            )
+        )
+        lines.append("      <node ref=\"R{}\" pin=\"1\"/>".format(index + 1))
+        lines.append("      <node ref=\"C{}\" pin=\"2\"/>".format(index + 1))
+        lines.append("    </net>")
+    lines.append("  </nets>")
+    lines.append("</export>")
+    return lines
+
+def generateNetlist(fileName, compCount, seed=1):
+    """Создать список цепей KiCad.
+
+    Формат определяется расширением имени файла: *.net -- S-выражения,
+    *.xml -- XML. Каждый компонент содержит около десяти элементов (поля,
+    источник в библиотеке, путь листа), а раздел цепей -- по одной цепи
+    из двух узлов на каждые два компонента. Таким образом, 8000
+    компонентов дают около 100 тыс. элементов списка цепей.
+
+    Аргументы:
+    fileName (str) -- полное имя создаваемого файла (*.net или *.xml);
+    compCount (int) -- количество компонентов;
+    seed (int) -- начальное значение генератора случайных чисел.
+
+    """
+    comps = _generateComponents(random.Random(seed), compCount)
+    if fileName.endswith(".xml"):
+        lines = _formatXml(comps)
+    else:
+        lines = _formatNet(comps)
+    with open(fileName, "w", encoding="utf-8") as netlist:
+        netlist.write("\n".join(lines) + "\n")
+
+def getPythonPath(template, names, revision=None):
+    """Получить каталог встроенных модулей шаблона.
+
+    Аргументы:
+    template (str) -- каталог шаблона, например "index";
+    names (tuple) -- имена требуемых модулей;
+    revision (str) -- ревизия git; если указана, модули извлекаются
+        во временный каталог.
+
+    Возвращаемое значение (str) -- полное имя каталога.
+
+    """
+    path = os.path.join(REPO_DIR, template, "Scripts", "python", "pythonpath")
+    if revision is None:
+        return path
+    tempDir = tempfile.mkdtemp(prefix="bench-")
+    for name in names:
+        source = subprocess.run(
+            [
+                "git", "-C", REPO_DIR, "show",
+                "{}:{}/Scripts/python/pythonpath/{}.py".format(revision, template, name)
+            ],
+            stdout=subprocess.PIPE,
+            check=True
+        ).stdout
+        with open(os.path.join(tempDir, name + ".py"), "wb") as moduleFile:
+            moduleFile.write(source)
+    return tempDir
+
+def loadModules(template, names, revision=None):
+    """Загрузить встроенные модули шаблона.
+
+    Модули регистрируются под уникальными именами, поэтому модули
+    разных ревизий могут использоваться одновременно. Как и при
+    открытии документа, модули инициализируются (init()), а параметры
+    загружаются со значениями по умолчанию.
+
+    Аргументы:
+    template (str) -- каталог шаблона, например "index";
+    names (tuple) -- имена модулей, например ("kicadnet",);
+    revision (str) -- ревизия git или None для рабочего каталога.
+
+    Возвращаемое значение (dict) -- имя модуля -> модуль.
+
+    """
+    path = getPythonPath(template, names, revision)
+    suffix = "_bench{}".format(next(_moduleCounter))
+    modules = {}
+    for name in names:
+        spec = importlib.util.spec_from_file_location(
+            name + suffix,
+            os.path.join(path, name + ".py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name + suffix] = module
+        spec.loader.exec_module(module)
+        modules[name] = module
+    if revision is not None:
+        shutil.rmtree(path)
+    scriptContext = ScriptContext(suffix)
+    for module in modules.values():
+        if hasattr(module, "init"):
+            module.init(scriptContext)
+    if "config" in modules:
+        modules["config"].load()
+    return modules
@@ -0,0 +1,232 @@
+"""Проверка и измерение формирования заголовков групп (CompGroup.getTitle).
+
+Заголовки, сформированные текущей реализацией, сравниваются с эталонной
+реализацией -- прежним алгоритмом с вложенными циклами и поиском
+в списке, перенесённым сюда без изменений. Проверяются случайные
+группы (наименования с пробелами и дефисами, пустые документы,
+повторы) и группа из 2000 диапазонов с различными наименованиями,
+для которой также измеряется время.
+
+Пример:
+
+    python3 bench/grouptitle.py
+
+Код возврата отличен от нуля, если заголовки не совпали.
+
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import benchlib
+
+# Метод получения значения для каждого шаблона
+VALUE_METHODS = {
+    "index": "getIndexValue",
+    "spec": "getSpecValue",
+    "gspec": "getSpecValue",
+}
+
+# Части, из которых составляются случайные наименования
+NAME_PARTS = ("DB", "DB-9", "IDC", "PLD", "PLS", "MF", "SMD", "10", "20", "M", "F")
+
+DOCS = ("", "ТУ 1", "ТУ 2", "ГОСТ 3")
+
+
+def referenceShortenName(name):
+    """Прежняя реализация CompGroup._shortenName()."""
+    index = len(name)
+    if " " in name:
+        index = name.index(" ")
+    if "-" in name:
+        index = min(index, name.index("-"))
+    name = name[:index]
+    name = name.rstrip(" -")
+    return name
+
+def referenceTitle(group, methodName):
+    """Прежняя реализация CompGroup.getTitle() (параметр "title with doc")."""
+    if len(group) == 0:
+        return []
+
+    getValue = lambda compRange, *args, **kwargs: \
+        getattr(compRange, methodName)(*args, **kwargs)
+    currentType = getValue(group[0], "type", plural=True)
+
+    # Список уникальных пар Наименование-Документ
+    nameDocList = []
+    for compRange in group:
+        currentName = getValue(compRange, "name")
+        currentShortestName = referenceShortenName(currentName)
+        currentDoc = getValue(compRange, "doc")
+        if not currentDoc:
+            currentName = ""
+        for i in range(len(nameDocList)):
+            savedName = nameDocList[i][0]
+            savedShortestName = referenceShortenName(savedName)
+            savedDoc = nameDocList[i][1]
+            if savedDoc == currentDoc \
+                    and savedShortestName == currentShortestName:
+                break
+        else:
+            nameDocList.append([currentName, currentDoc])
+
+    # Максимально сократить наименования
+    for i in range(len(nameDocList)):
+        name = nameDocList[i][0]
+        doc = nameDocList[i][1]
+        nameParts = re.findall(r"([-\s]?[^-\s]+)", name)
+        if len(nameParts) > 1:
+            for j in range(1, len(nameParts)):
+                shortName = "".join(nameParts[:j])
+                if [shortName, doc] not in nameDocList:
+                    nameDocList[i][0] = shortName
+                    break
+
+    # Сформировать наименование
+    if not nameDocList:
+        return [currentType]
+    firstDoc = nameDocList[0][-1]
+    for name, doc in nameDocList:
+        if doc != firstDoc:
+            break
+    else:
+        title = currentType
+        if title:
+            title += ' '
+        title += firstDoc
+        return [title]
+    groupNames = []
+    nameDocList.sort(key=lambda nameDoc: nameDoc[0])
+    for nameDoc in nameDocList:
+        name = currentType
+        if nameDoc[0]:
+            if name:
+                name += ' '
+            name += nameDoc[0]
+        if nameDoc[1]:
+            if name:
+                name += ' '
+            name += nameDoc[1]
+        groupNames.append(name)
+    return groupNames
+
+def makeGroup(schematic, sch, nameDocPairs):
+    """Создать группу из диапазонов с указанными наименованиями и документами."""
+    group = schematic.CompGroup(sch)
+    for index, (name, doc) in enumerate(nameDocPairs):
+        comp = schematic.Component(sch)
+        comp.reference = "X{}".format(index + 1)
+        comp.fields = {"Тип": "Разъём", "Наименование": name, "Документ": doc}
+        group._compRanges.append(schematic.CompRange(sch, comp))
+    return group
+
+def randomName(rnd):
+    """Случайное наименование из частей, разделённых пробелом или дефисом."""
+    name = ""
+    for _ in range(rnd.randint(0, 4)):
+        name += rnd.choice(("", " ", "-")) + rnd.choice(NAME_PARTS)
+    return name.strip()
+
+def check(template, fileName, groupCount, rangeCount, seed):
+    """Сравнить заголовки с эталонными для одного шаблона.
+
+    Возвращаемое значение (bool) -- все заголовки совпали.
+
+    """
+    modules = benchlib.loadModules(
+        template,
+        ("kicadnet", "kicadsch", "config", "schematic")
+    )
+    schematic = modules["schematic"]
+    modules["config"].setboolean("doc", "title with doc", True)
+    sch = schematic.Schematic(fileName, headerOnly=True)
+    methodName = VALUE_METHODS[template]
+    rnd = random.Random(seed)
+
+    mismatches = 0
+    for _ in range(groupCount):
+        nameDocPairs = [
+            (randomName(rnd), rnd.choice(DOCS))
+            for _ in range(rnd.randint(1, 12))
+        ]
+        group = makeGroup(schematic, sch, nameDocPairs)
+        if group.getTitle() != referenceTitle(group, methodName):
+            mismatches += 1
+            if mismatches == 1:
+                print("  не совпадает:", nameDocPairs)
+
+    # Группа с большим количеством различных наименований (например,
+    # разъёмы или микросхемы) и несколькими документами.
+    nameDocPairs = [
+        ("K{}-{} R".format(index, rnd.choice("ABCD")), "ТУ {}".format(index % 7))
+        for index in range(rangeCount)
+    ]
+    group = makeGroup(schematic, sch, nameDocPairs)
+    # Значения компонентов вычисляются заранее, чтобы измерялось
+    # только формирование заголовка.
+    group.getTitle()
+    startTime = time.perf_counter()
+    title = group.getTitle()
+    titleTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    expectedTitle = referenceTitle(group, methodName)
+    referenceTime = time.perf_counter() - startTime
+    same = title == expectedTitle
+
+    print(
+        "{:<6} случайные группы: несовпадений {}/{}; группа из {} "
+        "диапазонов: {}, эталон {:.2f} с, getTitle() {:.3f} с".format(
+            template,
+            mismatches,
+            groupCount,
+            rangeCount,
+            "совпадает" if same else "НЕ СОВПАДАЕТ",
+            referenceTime,
+            titleTime
+        )
+    )
+    return mismatches == 0 and same
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--templates",
+        default="index,spec,gspec",
+        help="шаблоны через запятую (по умолчанию index,spec,gspec)"
+    )
+    parser.add_argument(
+        "--groups",
+        type=int,
+        default=3000,
+        help="количество случайных групп (по умолчанию 3000)"
+    )
+    parser.add_argument(
+        "--ranges",
+        type=int,
+        default=2000,
+        help="количество диапазонов в большой группе (по умолчанию 2000)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=19,
+        help="начальное значение генератора случайных чисел"
+    )
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "bench.net")
+        benchlib.generateNetlist(fileName, 1)
+        for template in args.templates.split(","):
+            ok &= check(template, fileName, args.groups, args.ranges, args.seed)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
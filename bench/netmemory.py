@@ -0,0 +1,94 @@
+"""Объём памяти, занимаемый объектным представлением списка цепей.
+
+Создаёт список цепей из ~100 тыс. элементов и с помощью tracemalloc
+измеряет память, которую удерживает kicadnet.Netlist после разбора.
+Если указана ревизия для сравнения, то измерение повторяется
+с модулем kicadnet этой ревизии.
+
+Пример (сравнение с состоянием до перехода NetlistItem на __slots__):
+
+    python3 bench/netmemory.py --base 6970653^
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import benchlib
+
+
+def countItems(item):
+    """Подсчитать количество элементов в дереве."""
+    count = 0
+    stack = [item]
+    while stack:
+        item = stack.pop()
+        count += 1
+        stack.extend(item.items)
+    return count
+
+def measure(kicadnet, fileName):
+    """Разобрать список цепей и измерить удерживаемую память.
+
+    Возвращаемое значение (tuple) -- (байт памяти, количество элементов,
+        время разбора в секундах).
+
+    """
+    tracemalloc.start()
+    startTime = time.perf_counter()
+    netlist = kicadnet.Netlist(fileName)
+    parseTime = time.perf_counter() - startTime
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Подсчёт после измерения: обращение к "items" может создавать
+    # пустые списки.
+    return (size, countItems(netlist.data), parseTime)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--components",
+        type=int,
+        default=8000,
+        help="количество компонентов (по умолчанию 8000, ~100 тыс. элементов)"
+    )
+    parser.add_argument(
+        "--base",
+        help="ревизия git для сравнения"
+    )
+    parser.add_argument(
+        "--template",
+        default="index",
+        help="шаблон, из которого берётся модуль kicadnet"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "bench.net")
+        benchlib.generateNetlist(fileName, args.components)
+        revisions = [None]
+        if args.base:
+            revisions.insert(0, args.base)
+        results = []
+        for revision in revisions:
+            kicadnet = benchlib.loadModules(args.template, ("kicadnet",), revision)["kicadnet"]
+            size, count, parseTime = measure(kicadnet, fileName)
+            results.append(size)
+            print(
+                "{:<16} {} элементов: {:.1f} МБ ({:.0f} байт на элемент), "
+                "разбор {:.2f} с".format(
+                    revision or "рабочий каталог",
+                    count,
+                    size / 1e6,
+                    size / count,
+                    parseTime
+                )
+            )
+        if len(results) == 2:
+            print("Уменьшение: {:.1f}%".format(100 * (1 - results[1] / results[0])))
+
+if __name__ == "__main__":
+    main()
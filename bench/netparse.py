@@ -0,0 +1,196 @@
+"""Проверка и измерение разбора списка цепей в формате S-выражений.
+
+Результаты быстрого разбора (kicadnet.Netlist(fileName, fast=True))
+сравниваются с результатами прежнего посимвольного разбора (fast=False):
+для корректных файлов -- построенные деревья элементов, для файлов
+с ошибками -- текст исключения ParseException, включая номер строки
+и позицию. Проверяются списки цепей различного размера, их случайно
+искажённые варианты (удаление, вставка символов, усечение) и случайные
+последовательности лексем. Для большого списка цепей также измеряется
+время разбора обоими способами.
+
+Пример:
+
+    python3 bench/netparse.py
+
+Код возврата отличен от нуля, если результаты не совпали.
+
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import benchlib
+
+# Фрагменты, из которых составляются искажения и случайные файлы
+FRAGMENTS = (
+    "(", ")", " ", "\n", "\"", "\\", "a", "b", "\t",
+    "comp", "(x ", "\"a\\\"b\"", ") ", "\n  ",
+)
+
+
+def dumpItem(item):
+    """Представить дерево элементов в виде, пригодном для сравнения."""
+    if item is None:
+        return None
+    return (
+        item.name,
+        dict(item.attributes),
+        [dumpItem(subitem) for subitem in item.items],
+        item.text
+    )
+
+def parse(kicadnet, fileName, fast):
+    """Разобрать файл и вернуть результат в виде, пригодном для сравнения."""
+    try:
+        return ("дерево", dumpItem(kicadnet.Netlist(fileName, fast=fast).data))
+    except kicadnet.ParseException as error:
+        return ("ошибка", str(error))
+    except RecursionError:
+        return ("переполнение стека",)
+    except Exception as error:
+        return ("исключение", type(error).__name__)
+
+def mutate(rnd, content):
+    """Случайно исказить содержимое файла."""
+    for _ in range(rnd.randint(1, 3)):
+        position = rnd.randrange(len(content) + 1)
+        operation = rnd.random()
+        if operation < 0.4:
+            content = content[:position] + content[position + 1:]
+        elif operation < 0.8:
+            content = content[:position] + rnd.choice(FRAGMENTS) + content[position:]
+        else:
+            content = content[:position]
+    return content
+
+def randomContent(rnd):
+    """Случайная последовательность лексем."""
+    content = "".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randrange(30)))
+    if rnd.random() < 0.5:
+        content = "(" + content
+    return content
+
+def compare(kicadnet, fileName, content=None):
+    """Сравнить результаты разбора файла обоими способами.
+
+    Аргументы:
+    kicadnet (module) -- модуль kicadnet;
+    fileName (str) -- полное имя файла;
+    content (str) -- содержимое, записываемое в файл перед разбором;
+        если не указано, файл не изменяется.
+
+    Возвращаемое значение (tuple) -- (результаты совпали, результат
+        прежнего разбора, результат быстрого разбора).
+
+    """
+    if content is not None:
+        with open(fileName, "w", encoding="utf-8") as netlist:
+            netlist.write(content)
+    expected = parse(kicadnet, fileName, False)
+    result = parse(kicadnet, fileName, True)
+    return (result == expected, expected, result)
+
+def check(template, tempDir, count, compCount, seed):
+    """Сравнить результаты разбора для одного шаблона.
+
+    Возвращаемое значение (bool) -- все результаты совпали.
+
+    """
+    kicadnet = benchlib.loadModules(template, ("kicadnet",))["kicadnet"]
+    rnd = random.Random(seed)
+    fileName = os.path.join(tempDir, "check.net")
+
+    # Корректные списки цепей
+    sources = []
+    mismatches = 0
+    for index, sourceCompCount in enumerate((0, 1, 3, 20, 200)):
+        benchlib.generateNetlist(fileName, sourceCompCount, seed + index)
+        with open(fileName, encoding="utf-8") as netlist:
+            sources.append(netlist.read())
+        same, expected, result = compare(kicadnet, fileName)
+        if not same or expected[0] != "дерево":
+            mismatches += 1
+            print("  не совпадает: список цепей из", sourceCompCount, "компонентов")
+
+    # Искажённые списки цепей и случайные последовательности лексем
+    errors = 0
+    for index in range(count):
+        if index % 2:
+            content = randomContent(rnd)
+        else:
+            content = mutate(rnd, rnd.choice(sources[:4]))
+        same, expected, result = compare(kicadnet, fileName, content)
+        if expected[0] == "ошибка":
+            errors += 1
+        if not same:
+            mismatches += 1
+            if mismatches == 1:
+                print("  не совпадает:", repr(content))
+                print("    прежний разбор:", expected)
+                print("    быстрый разбор:", result)
+
+    # Время разбора большого списка цепей
+    benchlib.generateNetlist(fileName, compCount, seed)
+    startTime = time.perf_counter()
+    expected = parse(kicadnet, fileName, False)
+    referenceTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    result = parse(kicadnet, fileName, True)
+    fastTime = time.perf_counter() - startTime
+    same = result == expected
+
+    print(
+        "{:<8} случайные файлы: несовпадений {}/{} (с ошибками {}); "
+        "{} компонентов: {}, fast=False {:.2f} с, fast=True {:.2f} с".format(
+            template,
+            mismatches,
+            count + len(sources),
+            errors,
+            compCount,
+            "совпадает" if same else "НЕ СОВПАДАЕТ",
+            referenceTime,
+            fastTime
+        )
+    )
+    return mismatches == 0 and same
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--templates",
+        default="index",
+        help="шаблоны через запятую (по умолчанию index)"
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=20000,
+        help="количество случайных файлов (по умолчанию 20000)"
+    )
+    parser.add_argument(
+        "--components",
+        type=int,
+        default=5000,
+        help="количество компонентов в большом списке цепей (по умолчанию 5000)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="начальное значение генератора случайных чисел"
+    )
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tempDir:
+        for template in args.templates.split(","):
+            ok &= check(template, tempDir, args.count, args.components, args.seed)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
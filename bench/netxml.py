@@ -0,0 +1,99 @@
+"""Время разбора списка цепей в формате XML.
+
+Создаёт списки цепей в формате XML различного размера и измеряет время
+быстрого разбора средствами expat (kicadnet.Netlist(fileName, fast=True))
+и прежнего посимвольного разбора (fast=False), время которого растёт
+квадратично с размером файла. Деревья элементов, построенные обоими
+способами, сравниваются. Для списков цепей, превышающих порог, прежний
+разбор не выполняется.
+
+Пример:
+
+    python3 bench/netxml.py --components 1000,5000,50000
+
+Код возврата отличен от нуля, если деревья элементов не совпали.
+
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import benchlib
+
+
+def dumpItem(item):
+    """Представить дерево элементов в виде, пригодном для сравнения."""
+    return (
+        item.name,
+        dict(item.attributes),
+        [dumpItem(subitem) for subitem in item.items],
+        item.text
+    )
+
+def measure(kicadnet, fileName, fast):
+    """Разобрать список цепей.
+
+    Возвращаемое значение (tuple) -- (дерево элементов в виде,
+        пригодном для сравнения, время разбора в секундах).
+
+    """
+    startTime = time.perf_counter()
+    netlist = kicadnet.Netlist(fileName, fast=fast)
+    parseTime = time.perf_counter() - startTime
+    return (dumpItem(netlist.data), parseTime)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--components",
+        default="1000,5000,50000",
+        help="количество компонентов через запятую (по умолчанию 1000,5000,50000)"
+    )
+    parser.add_argument(
+        "--reference-limit",
+        type=int,
+        default=5000,
+        help="наибольшее количество компонентов, для которого выполняется "
+            "прежний разбор (по умолчанию 5000)"
+    )
+    parser.add_argument(
+        "--template",
+        default="index",
+        help="шаблон, из которого берётся модуль kicadnet"
+    )
+    args = parser.parse_args()
+
+    kicadnet = benchlib.loadModules(args.template, ("kicadnet",))["kicadnet"]
+    ok = True
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "bench.xml")
+        for compCount in map(int, args.components.split(",")):
+            benchlib.generateNetlist(fileName, compCount)
+            size = os.path.getsize(fileName)
+            data, fastTime = measure(kicadnet, fileName, True)
+            if compCount <= args.reference_limit:
+                expectedData, referenceTime = measure(kicadnet, fileName, False)
+                same = data == expectedData
+                ok &= same
+                reference = "{:.2f} с, {}".format(
+                    referenceTime,
+                    "совпадает" if same else "НЕ СОВПАДАЕТ"
+                )
+            else:
+                reference = "не выполнялся"
+            print(
+                "{:>6} компонентов ({:.1f} МБ): fast=True {:.2f} с, "
+                "fast=False {}".format(
+                    compCount,
+                    size / 1e6,
+                    fastTime,
+                    reference
+                )
+            )
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Количество вычислений значений компонентов для документа.
+
+Строит объектное представление схемы, группирует компоненты, формирует
+заголовки групп и запрашивает значения "type", "name", "doc", "comment"
+(в обычной форме, в единственном и во множественном числе), как это
+делают построители документов. Подсчитываются обращения к методу
+получения значения (getIndexValue/getSpecValue/getBomValue) и
+фактические вычисления -- вызовы, в которых разбирается шаблон поля.
+
+Пример (сравнение с состоянием до запоминания значений компонентов):
+
+    python3 bench/valuecount.py --base be68702^
+
+"""
+
+import argparse
+import collections
+import os
+import tempfile
+import time
+
+import benchlib
+
+# Метод получения значения для каждого шаблона
+VALUE_METHODS = {
+    "index": "getIndexValue",
+    "spec": "getSpecValue",
+    "gspec": "getSpecValue",
+    "bom": "getBomValue",
+    "gbom": "getBomValue",
+    "mexanic": "getBomValue",
+}
+
+VALUE_NAMES = ("type", "name", "doc", "comment")
+
+
+def count(template, revision, fileName):
+    """Выполнить подсчёт для указанной ревизии шаблона.
+
+    Возвращаемое значение (tuple) -- (количество компонентов,
+        счётчик обращений по компонентам, счётчик вычислений по
+        компонентам и значениям, время в секундах).
+
+    """
+    modules = benchlib.loadModules(
+        template,
+        ("kicadnet", "kicadsch", "config", "schematic"),
+        revision
+    )
+    schematic = modules["schematic"]
+    methodName = VALUE_METHODS[template]
+    getValue = getattr(schematic.Component, methodName)
+    formatPattern = schematic.Component.formatPattern
+    requests = collections.Counter()
+    computations = collections.Counter()
+    # Значение, вычисляемое в данный момент
+    current = []
+
+    def countedGetValue(self, name, singular=False, plural=False):
+        requests[id(self)] += 1
+        current.append((id(self), name, singular, plural))
+        try:
+            return getValue(self, name, singular, plural)
+        finally:
+            current.pop()
+
+    def countedFormatPattern(self, pattern, check=False, singular=False, plural=False):
+        if check and len(current) == 1:
+            computations[current[0]] += 1
+        return formatPattern(self, pattern, check, singular, plural)
+
+    setattr(schematic.Component, methodName, countedGetValue)
+    schematic.Component.formatPattern = countedFormatPattern
+
+    startTime = time.perf_counter()
+    sch = schematic.Schematic(fileName)
+    for group in sch.getGroupedComponents():
+        if hasattr(group, "getTitle"):
+            group.getTitle()
+        for compRange in group:
+            for name in VALUE_NAMES:
+                getattr(compRange, methodName)(name)
+                getattr(compRange, methodName)(name, singular=True)
+                getattr(compRange, methodName)(name, plural=True)
+    elapsed = time.perf_counter() - startTime
+    return (len(sch.components), requests, computations, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--components",
+        type=int,
+        default=5000,
+        help="количество компонентов (по умолчанию 5000)"
+    )
+    parser.add_argument(
+        "--base",
+        help="ревизия git для сравнения"
+    )
+    parser.add_argument(
+        "--templates",
+        default="index,spec,bom",
+        help="шаблоны через запятую (по умолчанию index,spec,bom)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "bench.net")
+        benchlib.generateNetlist(fileName, args.components)
+        revisions = [None]
+        if args.base:
+            revisions.insert(0, args.base)
+        for template in args.templates.split(","):
+            for revision in revisions:
+                compCount, requests, computations, elapsed = count(
+                    template,
+                    revision,
+                    fileName
+                )
+                print(
+                    "{:<8} {:<16} на компонент: обращений {:.1f}, "
+                    "вычислений {:.1f}; наибольшее количество вычислений "
+                    "одного значения {}; {:.2f} с".format(
+                        template,
+                        revision or "рабочий каталог",
+                        sum(requests.values()) / compCount,
+                        sum(computations.values()) / compCount,
+                        max(computations.values()),
+                        elapsed
+                    )
+                )
+
+if __name__ == "__main__":
+    main()
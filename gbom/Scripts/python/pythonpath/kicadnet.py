@@ -1,6 +1,66 @@
 """Объектное представление списка цепей KiCad."""
 
+import collections
+import gc
+import hashlib
 import html
+import marshal
+import os
+import re
+import sys
+import threading
+import types
+from xml.parsers import expat
+
+# Лексемы списка цепей в формате S-выражений (с предшествующими пробелами):
+# 1 - начало элемента и его имя;
+# 2 - конец элемента;
+# 3 - перевод строки;
+# 4 - значение в кавычках (закрывающая кавычка -- первая, перед которой
+#     нет символа '\\'; опережающая проверка исключает возврат назад);
+# 5 - значение без кавычек;
+# 6 - незакрытая кавычка.
+NET_TOKENS = re.compile(
+    r' *(?:'
+    r'\(([^ ()\n]*)'
+    r'|(\))'
+    r'|(\n)'
+    r'|"(?=((?:[^"\n]|(?<=\\)")*))\4"'
+    r'|([^ ()\n"][^ ()\n]*)'
+    r'|(")'
+    r')'
+)
+
+# Разделители строк (те же, что и у str.splitlines())
+LINE_BREAKS = re.compile('\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# Коды ошибок expat, означающие незавершённый элемент
+XML_TAG_MISMATCH = expat.errors.codes[expat.errors.XML_ERROR_TAG_MISMATCH]
+XML_UNEXPECTED_END_ERRORS = tuple(
+    expat.errors.codes[message] for message in (
+        expat.errors.XML_ERROR_NO_ELEMENTS,
+        expat.errors.XML_ERROR_UNCLOSED_TOKEN,
+        expat.errors.XML_ERROR_PARTIAL_CHAR,
+        expat.errors.XML_ERROR_TAG_MISMATCH,
+        expat.errors.XML_ERROR_UNCLOSED_CDATA_SECTION,
+    )
+)
+
+# Открывающий тег, в котором читается атрибут (от символа '<' до места
+# ошибки): 1 - прочитанная часть имени атрибута; 2 - знак '='.
+XML_TAG_ATTRIBUTE = re.compile(r'<[^/> ]+ [ ]*(?:[^\W_]+="[^"]*" *)*([^\W_]*)(=?)')
+
+# Версия формата файла кэша (увеличивается при изменении структуры данных)
+CACHE_VERSION = 1
+# Количество файлов, данные которых хранятся в памяти
+CACHE_SIZE = 4
+# Имя общего хранилища в sys.modules. Хранилище одно на весь процесс
+# LibreOffice, поэтому документы, построенные по разным шаблонам из
+# одного файла, используют результат одного разбора.
+SHARED_STORE_NAME = "eskd_templates_shared_store"
+# Кэш списков цепей в общем хранилище:
+# (полное имя, размер, время изменения) -> (хэш, данные)
+CACHE_NAME = "netlist{}".format(CACHE_VERSION)
 
 
 class ParseException(Exception):
@@ -19,7 +79,15 @@ class ParseException(Exception):
 
 
 class NetlistItem():
-    """Элемент списка цепей."""
+    """Элемент списка цепей.
+
+    Для экономии памяти элемент не имеет словаря атрибутов объекта
+    (__slots__), словарь "attributes" и список "items" создаются только
+    при первом обращении к ним, а имена элементов интернируются.
+
+    """
+
+    __slots__ = ("parent", "name", "_attributes", "_items", "text")
 
     def __init__(self, parent, name, attributes=None, items=None, text=None):
         """Создать элемент списка цепей.
@@ -42,21 +110,47 @@ class NetlistItem():
 
         """
         self.parent = parent
-        self.name = name
-        self.attributes = {} if attributes is None else attributes
-        self.items = [] if items is None else items
+        self.name = sys.intern(name)
+        self._attributes = attributes
+        self._items = items
         self.text = text
 
+    @property
+    def attributes(self):
+        if self._attributes is None:
+            self._attributes = {}
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        self._attributes = value
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = []
+        return self._items
+
+    @items.setter
+    def items(self, value):
+        self._items = value
+
 
 class Netlist():
     """Список цепей."""
 
-    def __init__(self, fileName):
+    def __init__(self, fileName, fast=True):
         """Считать список цепей.
 
         Загрузить содержимое файла списка цепей KiCad (*.net, *.xml)
         и построить его объектное представление.
 
+        Аргументы:
+        fileName (str) -- полное имя файла списка цепей;
+        fast (bool) -- использовать быстрый однопроходный разбор. Значение
+            False включает прежний посимвольный разбор, который оставлен
+            в качестве эталона для проверки эквивалентности.
+
         Атрибуты:
         fileName (str) -- полное имя файла списка цепей.
         data (NetlistItem) -- объектное представление списка цепей.
@@ -64,19 +158,33 @@ class Netlist():
         """
         self.fileName = fileName
         self.data = None
+        self._nameIndex = None
         self._reset()
         with open(fileName, encoding="utf-8") as netlist:
             if self.fileName.endswith(".net"):
-                self._content = netlist.read()
-                self.data = self._parseNetItem(None)
-                self._reset()
+                parse = self._parseNetItem
+                parseStream = _parseNetStream
             elif self.fileName.endswith(".xml"):
                 netlist.readline() # Пропустить первую строку (заголовок)
-                self._content = netlist.read()
-                self.data = self._parseXmlItem(None)
-                self._reset()
+                parse = self._parseXmlItem
+                parseStream = _parseXmlStream
             else:
                 self._error("Формат файла не поддерживается.")
+            # Сборщик мусора приостанавливается на время построения
+            # дерева: новые элементы не становятся мусором, а их
+            # многократный обход сборщиком удваивает время разбора.
+            gcEnabled = gc.isenabled()
+            gc.disable()
+            try:
+                if fast:
+                    self.data = next(parseStream(netlist), None)
+                else:
+                    self._content = netlist.read()
+                    self.data = parse(None)
+            finally:
+                if gcEnabled:
+                    gc.enable()
+        self._reset()
 
     def _reset(self):
         self._content = ""
@@ -185,7 +293,7 @@ class Netlist():
                 if item.text is None:
                     item.text = text
                 else:
-                    if type(item.text) != "list":
+                    if not isinstance(item.text, list):
                         item.text = [item.text]
                     item.text.append(text)
         else:
@@ -207,28 +315,56 @@ class Netlist():
                 text = '"{}"'.format(text)
         return text
 
-    def _formatNetItem(self, item):
-        output = '(' + item.name
-        for attrName in item.attributes:
-            attrValue = item.attributes[attrName]
-            attrValue = self._formatNetText(attrValue)
-            output += " ({} {})".format(attrName, attrValue)
-        if item.items:
-            output += '\n'
-            for subitem in item.items:
-                childText = self._formatNetItem(subitem)
-                for line in childText.splitlines():
-                    output += "  {}\n".format(line)
-        if item.text is not None:
-            if type(item.text) == "list":
-                for val in item.text:
-                    output += ' ' + self._formatNetText(val)
+    def _formatNetValue(self, text):
+        if isinstance(text, list):
+            return "".join(' ' + self._formatNetText(val) for val in text)
+        return ' ' + self._formatNetText(text)
+
+    def _writeNetItem(self, netlist, item):
+        """Записать элемент в поток в формате S-выражений.
+
+        Вывод совпадает с прежним форматированием, при котором текст каждого
+        дочернего элемента разбивался на строки и к ним добавлялся отступ,
+        но текст записывается в поток сразу, а отступ вложенных строк
+        определяется глубиной элемента.
+
+        """
+        write = netlist.write
+
+        def writeText(text, indent):
+            if indent:
+                text = LINE_BREAKS.sub('\n' + indent, text)
+            write(text)
+
+        # Стек: (элемент, итератор дочерних элементов, отступ элемента)
+        stack = [(None, iter((item,)), "")]
+        while stack:
+            parent, subitems, parentIndent = stack[-1]
+            item = next(subitems, None)
+            if item is None:
+                stack.pop()
+                if parent is not None:
+                    if parent.text is not None:
+                        write('\n' + parentIndent)
+                        writeText(self._formatNetValue(parent.text), parentIndent)
+                    write(')')
+                continue
+            if parent is None:
+                indent = ""
             else:
-                output += ' ' + self._formatNetText(item.text)
-        else:
-            output = output.rstrip('\n')
-        output += ')'
-        return output
+                indent = parentIndent + "  "
+                write('\n' + indent)
+            output = '(' + item.name
+            for attrName, attrValue in (item._attributes or {}).items():
+                attrValue = self._formatNetText(attrValue)
+                output += " ({} {})".format(attrName, attrValue)
+            writeText(output, indent)
+            if item._items:
+                stack.append((item, iter(item._items), indent))
+                continue
+            if item.text is not None:
+                writeText(self._formatNetValue(item.text), indent)
+            write(')')
 
     def _parseXmlAttribute(self):
         if not self._hasChar():
@@ -338,29 +474,89 @@ class Netlist():
             else:
                 self._error("Элемент неожиданно закончился!")
             if text:
-                item.text = text
+                item.text = html.unescape(text)
         return item
 
-    def _formatXmlItem(self, item):
-        output = '<' + item.name
-        for attrName in item.attributes:
-            attrValue = item.attributes[attrName]
-            attrValue = html.escape(attrValue)
-            output += ' {}="{}"'.format(attrName, attrValue)
-        if not item.text and not item.items:
-            output += "/>"
-            return output
-        output += '>'
-        if item.items:
-            output += '\n'
-            for subitem in item.items:
-                childText = self._formatXmlItem(subitem)
-                for line in childText.splitlines():
-                    output += "  {}\n".format(line)
-        if item.text:
-            output += item.text
-        output += "</{}>".format(item.name)
-        return output
+    def _writeXmlItem(self, netlist, item):
+        """Записать элемент в поток в формате XML.
+
+        Вывод совпадает с прежним форматированием (см. _writeNetItem()).
+
+        """
+        write = netlist.write
+
+        def writeText(text, indent):
+            if indent:
+                text = LINE_BREAKS.sub('\n' + indent, text)
+            write(text)
+
+        # Стек: (элемент, итератор дочерних элементов, отступ элемента)
+        stack = [(None, iter((item,)), "")]
+        while stack:
+            parent, subitems, parentIndent = stack[-1]
+            item = next(subitems, None)
+            if item is None:
+                stack.pop()
+                if parent is not None:
+                    write('\n' + parentIndent)
+                    if parent.text:
+                        writeText(html.escape(parent.text, quote=False), parentIndent)
+                    write("</{}>".format(parent.name))
+                continue
+            if parent is None:
+                indent = ""
+            else:
+                indent = parentIndent + "  "
+                write('\n' + indent)
+            output = '<' + item.name
+            for attrName, attrValue in (item._attributes or {}).items():
+                attrValue = html.escape(attrValue)
+                output += ' {}="{}"'.format(attrName, attrValue)
+            writeText(output, indent)
+            if not item.text and not item._items:
+                write("/>")
+                continue
+            write('>')
+            if item._items:
+                stack.append((item, iter(item._items), indent))
+                continue
+            writeText(html.escape(item.text, quote=False), indent)
+            write("</{}>".format(item.name))
+
+    def updateIndex(self):
+        """Построить указатель элементов по именам.
+
+        Указатель строится при первом поиске во всём списке цепей (вызов
+        find() или items() без аргумента "item"), после чего поиск занимает
+        время, пропорциональное количеству найденных элементов. Если дерево
+        элементов было изменено, указатель нужно построить заново, вызвав
+        этот метод.
+
+        """
+        index = {}
+        if self.data is not None:
+            # Количество открытых (ещё не пройденных) предков с каждым именем
+            openNames = {}
+            openItemNames = []
+            stack = [iter((self.data,))]
+            while stack:
+                for item in stack[-1]:
+                    name = item.name
+                    if not openNames.get(name):
+                        if name in index:
+                            index[name].append(item)
+                        else:
+                            index[name] = [item]
+                    if item._items:
+                        openNames[name] = openNames.get(name, 0) + 1
+                        openItemNames.append(name)
+                        stack.append(iter(item._items))
+                        break
+                else:
+                    stack.pop()
+                    if openItemNames:
+                        openNames[openItemNames.pop()] -= 1
+        self._nameIndex = index
 
     def find(self, name, item=None):
         """Найти элемент списка цепей с указанным именем.
@@ -370,38 +566,36 @@ class Netlist():
         Если элемент найти не удастся -- будет возвращено значение None.
 
         Аргументы:
-        name (str) -- имя элемента.
+        name (str) -- имя элемента;
+        item (NetlistItem) -- элемент, внутри которого (включительно)
+            выполняется поиск. По умолчанию -- весь список цепей.
 
         """
         if item is None:
-            item = self.data
-        if item.name == name:
-            return item
-        for subitem in item.items:
-            foundItem = self.find(name, subitem)
-            if foundItem is not None:
-                return foundItem
-        return None
+            if self._nameIndex is None:
+                self.updateIndex()
+            foundItems = self._nameIndex.get(name)
+            return foundItems[0] if foundItems else None
+        return _findItem(item, name)
 
     def items(self, name, item=None):
         """Перебор элементов списка цепей с указанным именем.
 
         Будет возвращён итератор, возвращающий элементы с указанным именем
         (порядок элементов соответствует тому, который имеется в файле списка
-        цепей).
+        цепей). Элементы, вложенные в найденные, не возвращаются.
 
         Аргументы:
-        name (str) -- имя элемента.
+        name (str) -- имя элемента;
+        item (NetlistItem) -- элемент, внутри которого (включительно)
+            выполняется поиск. По умолчанию -- весь список цепей.
 
         """
         if item is None:
-            item = self.data
-        if item.name == name:
-            yield item
-        else:
-            for subitem in item.items:
-                for nextItem in self.items(name, subitem):
-                    yield nextItem
+            if self._nameIndex is None:
+                self.updateIndex()
+            return iter(self._nameIndex.get(name, ()))
+        return _iterItems(item, name)
 
     def save(self, fileName=None):
         """Записать данные списка цепей в файл.
@@ -414,7 +608,607 @@ class Netlist():
             fileName = self.fileName
         with open(fileName, 'w', encoding='utf-8') as netlist:
             if fileName.endswith(".net"):
-                netlist.write(self._formatNetItem(self.data))
+                self._writeNetItem(netlist, self.data)
             else:
                 netlist.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                netlist.write(self._formatXmlItem(self.data))
+                self._writeXmlItem(netlist, self.data)
+
+
+def _parseNetStream(stream, names=None):
+    """Разобрать список цепей в формате S-выражений.
+
+    Содержимое читается построчно (лексемы не могут переходить на
+    следующую строку) и разбивается на лексемы регулярным выражением,
+    а вложенность элементов отслеживается стеком, а не рекурсией.
+    Дерево элементов, строка и позиция в сообщениях об ошибках совпадают
+    с результатом посимвольного разбора Netlist._parseNetItem().
+
+    Аргументы:
+    stream (file) -- поток с содержимым файла;
+    names (set of str) -- имена элементов, которые нужно вернуть. Если
+        не указаны -- возвращается корневой элемент.
+
+    Возвращаемое значение -- итератор, возвращающий элементы по мере их
+        считывания. Возвращаются только элементы, доступные через
+        NetlistItem.items, и не возвращаются вложенные в уже найденные.
+        Элементы, не входящие в найденные, не создаются.
+
+    """
+    parents = []
+    item = None
+    isAttribute = True
+    # Признаки незахваченных элементов: [доступен, в режиме атрибутов]
+    skipped = []
+    lineNumber = 0
+    line = ""
+    for line in stream:
+        lineNumber += 1
+        if lineNumber == 1 and line[0] != '(':
+            raise ParseException(
+                1, 1,
+                "Элемент должен начинаться символом '('!"
+            )
+        for match in NET_TOKENS.finditer(line):
+            kind = match.lastindex
+            if kind == 1:
+                if match.end() == len(line):
+                    raise ParseException(
+                        lineNumber,
+                        len(line) + 1,
+                        "Элемент неожиданно закончился!"
+                    )
+                name = match.group(1)
+                if name == "":
+                    raise ParseException(
+                        lineNumber,
+                        match.end() + 1,
+                        "Элемент не имеет имени!"
+                    )
+                if item is not None:
+                    parents.append((item, isAttribute))
+                    item = NetlistItem(item, name)
+                    isAttribute = True
+                else:
+                    visible = not skipped \
+                        or (skipped[-1][0] and not skipped[-1][1])
+                    if visible and (names is None or name in names):
+                        item = NetlistItem(None, name)
+                        isAttribute = True
+                    else:
+                        skipped.append([visible, True])
+            elif kind == 3:
+                if item is not None:
+                    isAttribute = False
+                else:
+                    skipped[-1][1] = False
+            elif kind == 2:
+                if item is None:
+                    skipped.pop()
+                    if not skipped:
+                        return
+                elif parents:
+                    subitem = item
+                    item, isAttribute = parents.pop()
+                    if isAttribute:
+                        item.attributes[subitem.name] = subitem.text
+                    else:
+                        item.items.append(subitem)
+                else:
+                    subitem = item
+                    item = None
+                    yield subitem
+                    if not skipped:
+                        return
+            elif kind == 6:
+                raise ParseException(
+                    lineNumber,
+                    len(line.rstrip('\n')) + 1,
+                    "Значение неожиданно закончилось " \
+                    "(должно заканчиваться символом '\"')!"
+                )
+            else:
+                if kind == 4:
+                    text = match.group(4)
+                    text = text.replace("\\\"", "\"")
+                    text = text.replace("\\\\", "\\")
+                else:
+                    if match.end() == len(line):
+                        raise ParseException(
+                            lineNumber,
+                            len(line) + 1,
+                            "Значение неожиданно закончилось!"
+                        )
+                    text = match.group(5)
+                if item is None:
+                    continue
+                if item.text is None:
+                    item.text = text
+                elif isinstance(item.text, list):
+                    item.text.append(text)
+                else:
+                    item.text = [item.text, text]
+    if lineNumber == 0:
+        return
+    if line.endswith('\n'):
+        lineNumber += 1
+        line = ""
+    raise ParseException(
+        lineNumber,
+        len(line) + 1,
+        "Элемент неожиданно закончился " \
+        "(должен заканчиваться символом ')')!"
+    )
+
+
+def _parseXmlStream(stream, names=None):
+    """Разобрать список цепей в формате XML средствами expat.
+
+    Строится то же дерево элементов, что и при разборе
+    Netlist._parseXmlItem(): если содержимое элемента начинается
+    с перевода строки, то оно считается набором дочерних элементов,
+    иначе -- текстовым значением. Ошибки expat преобразуются в сообщения
+    посимвольного разборщика. Первая строка файла (заголовок) должна быть
+    пропущена заранее.
+
+    Аргументы и возвращаемое значение -- как у _parseNetStream().
+
+    """
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    items = []
+    texts = []
+    completed = []
+    depth = 0
+    finished = False
+    lineNumber = 0
+    previousLine = ""
+    line = ""
+
+    def checkText(text, eventLine=None, eventPos=None):
+        """Проверить, что между дочерними элементами нет значения.
+
+        Текст предшествует позиции eventLine, eventPos (по умолчанию --
+        текущей позиции разбора). Позиция первого недопустимого символа
+        в сообщении -- та же, что и при посимвольном разборе.
+
+        """
+        tail = text.lstrip(" \n")
+        if not tail:
+            return
+        if eventLine is None:
+            eventLine = parser.CurrentLineNumber
+            eventPos = parser.CurrentColumnNumber + 1
+        breaks = tail.count('\n')
+        errorLine = eventLine - breaks
+        if breaks == 0:
+            errorPos = eventPos - len(tail)
+        else:
+            # Часть текста до конца строки с недопустимым символом
+            firstPart = tail[:tail.index('\n')]
+            head = text[:len(text) - len(tail)]
+            if errorLine in (lineNumber, lineNumber - 1):
+                errorText = line if errorLine == lineNumber else previousLine
+                errorPos = len(errorText.rstrip('\n')) - len(firstPart) + 1
+            elif '\n' in head:
+                errorPos = len(head) - head.rfind('\n')
+            else:
+                errorLine = eventLine
+                errorPos = eventPos
+        raise ParseException(
+            errorLine,
+            errorPos,
+            "Обнаружен недопустимый символ '{}'!".format(tail[0])
+        )
+
+    def startElement(name, attributes):
+        nonlocal depth
+        if items:
+            # Значение проверяется до первого дочернего элемента,
+            # а далее накапливается только текст между ними.
+            parentTexts = texts[-1]
+            if parentTexts:
+                checkText("".join(parentTexts))
+                del parentTexts[:]
+            item = NetlistItem(items[-1], name, attributes or None)
+            items[-1].items.append(item)
+        elif (depth == 0 and names is None) \
+            or (names is not None and name in names):
+                item = NetlistItem(None, name, attributes or None)
+        else:
+            depth += 1
+            return
+        items.append(item)
+        texts.append([])
+        depth += 1
+
+    def endElement(name):
+        nonlocal depth, finished
+        depth -= 1
+        if depth == 0:
+            # Содержимое после корневого элемента не рассматривается
+            finished = True
+        if not items:
+            return
+        item = items.pop()
+        text = "".join(texts.pop())
+        if item._items or text.startswith('\n'):
+            checkText(text)
+        elif text:
+            item.text = text
+        if not items:
+            completed.append(item)
+
+    def characterData(text):
+        if texts:
+            texts[-1].append(text)
+
+    parser.StartElementHandler = startElement
+    parser.EndElementHandler = endElement
+    parser.CharacterDataHandler = characterData
+    try:
+        for line in stream:
+            lineNumber += 1
+            if lineNumber == 1 and line[0] != '<':
+                raise ParseException(
+                    1, 1,
+                    "Элемент должен начинаться символом '<'!"
+                )
+            parser.Parse(line, False)
+            for item in completed:
+                yield item
+            del completed[:]
+            if finished:
+                return
+            previousLine = line
+        if lineNumber == 0:
+            return
+        parser.Parse("", True)
+    except expat.ExpatError as error:
+        if finished:
+            for item in completed:
+                yield item
+            return
+        if error.code in XML_UNEXPECTED_END_ERRORS:
+            if error.code == XML_TAG_MISMATCH and items:
+                # Получить текст, накопленный перед закрывающим тегом
+                parser.buffer_text = False
+                text = "".join(texts[-1])
+                if items[-1]._items or text.startswith('\n'):
+                    # Закрывающий тег другого элемента среди дочерних
+                    # элементов посимвольный разбор принимает за
+                    # элемент без имени.
+                    checkText(text, error.lineno, error.offset - 1)
+                    raise ParseException(
+                        error.lineno,
+                        error.offset,
+                        "Элемент не имеет имени!"
+                    )
+            if error.code == XML_TAG_MISMATCH:
+                raise ParseException(
+                    error.lineno,
+                    error.offset + 1,
+                    "Элемент неожиданно закончился!"
+                )
+            if line.endswith('\n'):
+                lineNumber += 1
+                line = ""
+            if line[line.rfind('<'):].count('"') % 2:
+                raise ParseException(
+                    lineNumber,
+                    len(line) + 1,
+                    "Значение неожиданно закончилось " \
+                    "(должно заканчиваться символом '\"')!"
+                )
+            raise ParseException(
+                lineNumber,
+                len(line) + 1,
+                "Элемент неожиданно закончился!"
+            )
+        if error.lineno == lineNumber:
+            errorText = line
+        elif error.lineno == lineNumber - 1:
+            errorText = previousLine
+        else:
+            errorText = ""
+        raise _xmlSyntaxError(errorText, error.lineno, error.offset)
+
+
+def _xmlSyntaxError(line, lineNumber, offset):
+    """Сформировать исключение для недопустимого символа в XML.
+
+    Сообщение и позиция выбираются те же, что и при посимвольном разборе
+    Netlist._parseXmlItem(), если ошибку можно определить по содержимому
+    строки до недопустимого символа.
+
+    Аргументы:
+    line (str) -- строка, содержащая ошибку (пустая, если недоступна);
+    lineNumber (int) -- номер строки;
+    offset (int) -- позиция недопустимого символа (отсчёт от нуля).
+
+    Возвращаемое значение (ParseException) -- исключение.
+
+    """
+    character = line[offset:offset + 1]
+    head = line[:offset]
+    if head.endswith('<') and character in "/> ":
+        return ParseException(lineNumber, offset + 1, "Элемент не имеет имени!")
+    if head.endswith("</"):
+        return ParseException(lineNumber, offset, "Элемент не имеет имени!")
+    if head.endswith('/') and character != '>':
+        return ParseException(
+            lineNumber,
+            offset,
+            "Недопустимая последовательность символов " \
+            "(после '/' ожидался символ '>')!"
+        )
+    if character == '/' and line[offset + 1:offset + 2] != '>':
+        return ParseException(
+            lineNumber,
+            offset + 1,
+            "Недопустимая последовательность символов " \
+            "(после '/' ожидался символ '>')!"
+        )
+    match = XML_TAG_ATTRIBUTE.fullmatch(head, max(head.rfind('<'), 0))
+    if match and character:
+        if match.group(2):
+            return ParseException(
+                lineNumber,
+                offset + 1,
+                "Значение должно начинаться символом '\"')!"
+            )
+        if character == '=' and not match.group(1):
+            return ParseException(lineNumber, offset + 2, "Атрибут не имеет имени!")
+        return ParseException(
+            lineNumber,
+            offset + 2,
+            "В имени атрибута содержится недопустимый символ '{}'!".format(character)
+        )
+    return ParseException(
+        lineNumber,
+        offset + 1,
+        "Обнаружен недопустимый символ '{}'!".format(character)
+    )
+
+
+def _iterStream(fileName, names):
+    with open(fileName, encoding="utf-8") as netlist:
+        if fileName.endswith(".net"):
+            parseStream = _parseNetStream
+        elif fileName.endswith(".xml"):
+            netlist.readline() # Пропустить первую строку (заголовок)
+            parseStream = _parseXmlStream
+        else:
+            raise ParseException(1, 1, "Формат файла не поддерживается.")
+        for item in parseStream(netlist, names):
+            yield item
+
+
+def iterItems(fileName, *names):
+    """Перебор элементов файла списка цепей с указанными именами.
+
+    В отличие от Netlist.items(), файл читается и разбирается по мере
+    перебора, а дерево строится только для найденных элементов. Например,
+    разделы "nets" и "libparts" пропускаются без создания элементов,
+    поэтому расход памяти не зависит от размера файла.
+    Найденные элементы не имеют родителя (parent is None).
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей (*.net, *.xml);
+    names (str) -- имена элементов.
+
+    """
+    return _iterStream(fileName, frozenset(names))
+
+
+def iterComponents(fileName):
+    """Перебор компонентов (элементов "comp") файла списка цепей.
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей (*.net, *.xml).
+
+    """
+    return iterItems(fileName, "comp")
+
+
+def readTitleBlock(fileName):
+    """Считать основную надпись корневого листа схемы.
+
+    Чтение файла прекращается сразу после того, как будет считан
+    элемент "sheet" с именем "/".
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей (*.net, *.xml).
+
+    Возвращаемое значение -- элемент "title_block" (NetlistItem) или None,
+        если корневой лист или его основная надпись отсутствуют.
+
+    """
+    for sheet in iterItems(fileName, "sheet"):
+        if sheet.attributes.get("name") == "/":
+            return _findItem(sheet, "title_block")
+    return None
+
+
+def _findItem(item, name):
+    stack = [item]
+    while stack:
+        item = stack.pop()
+        if item.name == name:
+            return item
+        if item._items:
+            stack.extend(reversed(item._items))
+    return None
+
+
+def _iterItems(item, name):
+    stack = [item]
+    while stack:
+        item = stack.pop()
+        if item.name == name:
+            yield item
+        elif item._items:
+            stack.extend(reversed(item._items))
+
+
+def _packItem(item):
+    return (
+        item.name,
+        item._attributes,
+        [_packItem(subitem) for subitem in item._items or ()],
+        item.text
+    )
+
+
+def _unpackItem(data, parent=None):
+    name, attributes, items, text = data
+    if attributes:
+        attributes = dict(attributes)
+    if isinstance(text, list):
+        text = list(text)
+    item = NetlistItem(parent, name, attributes or None, None, text)
+    if items:
+        item.items = [_unpackItem(subitem, item) for subitem in items]
+    return item
+
+
+def _getFileDigest(fileName):
+    digest = hashlib.sha1()
+    with open(fileName, "rb") as netlist:
+        for chunk in iter(lambda: netlist.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _readCacheFile(cacheName, size, mtime, digest):
+    try:
+        with open(cacheName, "rb") as cacheFile:
+            version, cachedSize, cachedMtime, cachedDigest, data = \
+                marshal.loads(cacheFile.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != CACHE_VERSION \
+        or cachedSize != size \
+        or cachedMtime != mtime:
+            return None
+    if digest is not None and cachedDigest != digest:
+        return None
+    return data
+
+
+def _writeCacheFile(cacheName, size, mtime, digest, data):
+    tempName = cacheName + ".tmp"
+    try:
+        with open(tempName, "wb") as cacheFile:
+            marshal.dump((CACHE_VERSION, size, mtime, digest, data), cacheFile)
+        os.replace(tempName, cacheName)
+    except (OSError, ValueError):
+        try:
+            os.remove(tempName)
+        except OSError:
+            pass
+
+
+def getSharedCache(name):
+    """Получить кэш из общего для всех документов хранилища.
+
+    Хранилище размещается в sys.modules под постоянным именем, так как
+    встроенные модули каждого документа загружаются под собственными
+    именами. В кэше следует хранить только данные встроенных типов
+    (кортежи, списки, словари, строки), но не объекты классов модулей
+    документа: документ может быть закрыт, а его шаблон -- иметь
+    другую версию.
+
+    Аргументы:
+    name (str) -- имя кэша (следует включать версию формата данных).
+
+    Возвращаемое значение -- кортеж (cache, lock), где
+        cache -- collections.OrderedDict,
+        lock -- threading.Lock, который нужно захватывать на время
+            обращения к кэшу (документы формируются в разных потоках).
+
+    """
+    store = sys.modules.get(SHARED_STORE_NAME)
+    if store is None:
+        store = types.ModuleType(SHARED_STORE_NAME)
+        store.lock = threading.Lock()
+        store.caches = {}
+        store = sys.modules.setdefault(SHARED_STORE_NAME, store)
+    with store.lock:
+        cache = store.caches.setdefault(name, collections.OrderedDict())
+    return cache, store.lock
+
+
+def readNetlistData(fileName, diskCache=False, checkContent=False):
+    """Считать основную надпись и компоненты с использованием кэша.
+
+    Результат разбора сохраняется в памяти (для нескольких последних
+    файлов) и, при необходимости, в файле "<имя списка цепей>.cache"
+    рядом со списком цепей. Кэш в памяти общий для всех открытых
+    документов (см. getSharedCache()). Сохранённые данные используются
+    повторно, пока не изменятся размер или время изменения файла,
+    поэтому повторное формирование документа, а также формирование
+    других документов по тому же списку цепей, не требует разбора файла.
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей (*.net, *.xml);
+    diskCache (bool) -- использовать файл кэша рядом со списком цепей;
+    checkContent (bool) -- дополнительно сверять хэш содержимого файла
+        (на случай изменения файла без изменения размера и времени).
+
+    Возвращаемое значение -- кортеж (titleBlock, components), где
+        titleBlock -- элемент "title_block" корневого листа или None,
+        components -- список элементов "comp". Каждый вызов возвращает
+        новые объекты, поэтому их можно изменять.
+
+    """
+    fileName = os.path.abspath(fileName)
+    status = os.stat(fileName)
+    key = (fileName, status.st_size, status.st_mtime_ns)
+    digest = _getFileDigest(fileName) if checkContent else None
+    data = None
+    cache, lock = getSharedCache(CACHE_NAME)
+    with lock:
+        if key in cache:
+            cachedDigest, cachedData = cache[key]
+            if digest is None or cachedDigest == digest:
+                data = cachedData
+                cache.move_to_end(key)
+    cacheName = fileName + ".cache"
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        if data is None and diskCache:
+            data = _readCacheFile(cacheName, key[1], key[2], digest)
+        if data is None:
+            titleBlock = None
+            rootSheetFound = False
+            components = []
+            for item in iterItems(fileName, "sheet", "comp"):
+                if item.name == "comp":
+                    components.append(_packItem(item))
+                elif not rootSheetFound \
+                    and item.attributes.get("name") == "/":
+                        rootSheetFound = True
+                        titleBlock = _findItem(item, "title_block")
+                        if titleBlock is not None:
+                            titleBlock = _packItem(titleBlock)
+            data = (titleBlock, components)
+            if diskCache:
+                _writeCacheFile(cacheName, key[1], key[2], digest, data)
+        with lock:
+            # Устаревшие данные того же файла больше не понадобятся
+            for cachedKey in list(cache):
+                if cachedKey[0] == fileName and cachedKey != key:
+                    del cache[cachedKey]
+            cache[key] = (digest, data)
+            cache.move_to_end(key)
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+        titleBlock, components = data
+        return (
+            _unpackItem(titleBlock) if titleBlock is not None else None,
+            [_unpackItem(comp) for comp in components]
+        )
+    finally:
+        if gcEnabled:
+            gc.enable()
@@ -7,6 +7,7 @@ import zipimport
 EMBEDDED_MODULES = (
     "textwidth",
     "kicadnet",
+    "kicadsch",
     "config",
     "schematic",
     "common",
@@ -44,113 +45,122 @@ class DocModifyListener(unohelper.Base, XModifyListener):
         doc.removeModifyListener(self)
         doc.UndoManager.lock()
 
-        # Обновление высоты строк.
-        firstPageStyleName = doc.Text.createTextCursor().PageDescName
-        varTableIsPresent = doc.TextFrames.hasByName("Наименования_исполнений")
-        if firstPageStyleName and "Спецификация" in doc.TextTables:
-            table = doc.TextTables["Спецификация"]
-            tableRowCount = table.Rows.Count
-            if firstPageStyleName != self.prevFirstPageStyleName \
-                or tableRowCount != self.prevTableRowCount \
-                or varTableIsPresent != self.prevVarTableIsPresent:
-                    self.prevFirstPageStyleName = firstPageStyleName
-                    self.prevTableRowCount = tableRowCount
-                    self.prevVarTableIsPresent = varTableIsPresent
-                    if not common.isThreadWorking():
-                        # Обновить высоту строк.
-                        common.updateTableRowsHeight()
+        try:
+            # Обновление высоты строк.
+            firstPageStyleName = doc.Text.createTextCursor().PageDescName
+            varTableIsPresent = doc.TextFrames.hasByName("Наименования_исполнений")
+            if firstPageStyleName and "Спецификация" in doc.TextTables:
+                table = doc.TextTables["Спецификация"]
+                tableRowCount = table.Rows.Count
+                if firstPageStyleName != self.prevFirstPageStyleName \
+                    or tableRowCount != self.prevTableRowCount \
+                    or varTableIsPresent != self.prevVarTableIsPresent:
+                        # Если изменилось только количество строк, то
+                        # проверяются лишь строки вблизи границ листов.
+                        rowCountChange = None
+                        if firstPageStyleName == self.prevFirstPageStyleName \
+                            and varTableIsPresent == self.prevVarTableIsPresent:
+                                rowCountChange = abs(tableRowCount - self.prevTableRowCount)
+                        self.prevFirstPageStyleName = firstPageStyleName
+                        self.prevTableRowCount = tableRowCount
+                        self.prevVarTableIsPresent = varTableIsPresent
+                        if not common.isThreadWorking():
+                            # Обновить высоту строк.
+                            common.updateTableRowsHeight(rowCountChange)
 
-                        # Позиция таблицы наименований исполнений
-                        # непосредственно под основной таблицей,
-                        # но только на первом листе.
-                        common.updateVarTablePosition()
+                            # Позиция таблицы наименований исполнений
+                            # непосредственно под основной таблицей,
+                            # но только на первом листе.
+                            common.updateVarTablePosition()
 
-        if not common.isThreadWorking():
-            currentCell = doc.CurrentController.ViewCursor.Cell
-            currentTable = doc.CurrentController.ViewCursor.TextTable
-            currentFrame = doc.CurrentController.ViewCursor.TextFrame
+            if not common.isThreadWorking():
+                currentCell = doc.CurrentController.ViewCursor.Cell
+                currentTable = doc.CurrentController.ViewCursor.TextTable
+                currentFrame = doc.CurrentController.ViewCursor.TextFrame
 
-            # Подстройка масштаба шрифта по ширине.
-            if currentCell or currentFrame:
-                if currentCell:
-                    itemName = ""
-                    if currentTable.Name == "Спецификация" \
-                        and currentCell.CellName != "A1":
-                            # По непонятной причине при добавлении строки
-                            # изменяется ширина текста в ячейке А1!
-                            itemName = "ТабСП." + currentCell.CellName[0]
-                    elif currentTable.Name == "Таблица_наименований_исполнений":
-                        itemName = "ТабНИ." + currentCell.CellName[-1]
-                    elif currentTable.Name == "Лист_регистрации_изменений":
-                        itemName = "ТабРИ." + currentCell.CellName[0]
-                    elif currentTable.Name.startswith("Изм_таб_"):
-                        itemName = "ТабТИ." + currentCell.CellName[0]
-                    item = currentCell
-                else: # currentFrame
-                    itemName = currentFrame.Name[8:]
-                    item = currentFrame
-                if itemName in common.ITEM_WIDTHS:
-                    itemWidth = common.ITEM_WIDTHS[itemName]
-                    itemCursor = item.createTextCursor()
-                    if itemName == "ТабСП.C":
-                        # Подстроить ширину всех позиционных номеров
-                        # при изменении хотя бы одного.
-                        doc.TextFields.refresh()
-                        for row in range(2, currentTable.Rows.Count):
-                            cellPos = currentTable.getCellByName(
-                                "C{}".format(row + 1)
-                            )
-                            for textContent in cellPos:
+                # Подстройка масштаба шрифта по ширине.
+                if currentCell or currentFrame:
+                    if currentCell:
+                        itemName = ""
+                        if currentTable.Name == "Спецификация" \
+                            and currentCell.CellName != "A1":
+                                # По непонятной причине при добавлении строки
+                                # изменяется ширина текста в ячейке А1!
+                                itemName = "ТабСП." + currentCell.CellName[0]
+                        elif currentTable.Name == "Таблица_наименований_исполнений":
+                            itemName = "ТабНИ." + currentCell.CellName[-1]
+                        elif currentTable.Name == "Лист_регистрации_изменений":
+                            itemName = "ТабРИ." + currentCell.CellName[0]
+                        elif currentTable.Name.startswith("Изм_таб_"):
+                            itemName = "ТабТИ." + currentCell.CellName[0]
+                        item = currentCell
+                    else: # currentFrame
+                        itemName = currentFrame.Name[8:]
+                        item = currentFrame
+                    if itemName in common.ITEM_WIDTHS:
+                        itemWidth = common.ITEM_WIDTHS[itemName]
+                        itemCursor = item.createTextCursor()
+                        if itemName == "ТабСП.C":
+                            # Подстроить ширину всех позиционных номеров
+                            # при изменении хотя бы одного.
+                            doc.TextFields.refresh()
+                            for row in range(2, currentTable.Rows.Count):
+                                cellPos = currentTable.getCellByName(
+                                    "C{}".format(row + 1)
+                                )
+                                for textContent in cellPos:
+                                    widthFactor = textwidth.getWidthFactor(
+                                        cellPos.String,
+                                        textContent.CharHeight,
+                                        itemWidth - 1
+                                    )
+                                    textContent.CharScaleWidth = widthFactor
+                        else:
+                            for line in item.String.splitlines(keepends=True):
                                 widthFactor = textwidth.getWidthFactor(
-                                    cellPos.String,
-                                    textContent.CharHeight,
+                                    line,
+                                    itemCursor.CharHeight,
                                     itemWidth - 1
                                 )
-                                textContent.CharScaleWidth = widthFactor
-                    else:
-                        for line in item.String.splitlines(keepends=True):
-                            widthFactor = textwidth.getWidthFactor(
-                                line,
-                                itemCursor.CharHeight,
-                                itemWidth - 1
-                            )
-                            itemCursor.goRight(len(line), True)
-                            itemCursor.CharScaleWidth = widthFactor
-                            itemCursor.collapseToEnd()
-
-            # Синхронизация содержимого полей в разных стилях страниц.
-            if currentFrame is not None \
-                and currentFrame.Name.startswith("Перв.") \
-                and not currentFrame.Name.endswith("7 Лист") \
-                and not currentFrame.Name.endswith("8 Листов"):
-                    # Обновить только текущую графу
-                    name = currentFrame.Name[8:]
-                    text = currentFrame.String
-                    cursor = currentFrame.createTextCursor()
-                    fontSize = cursor.CharHeight
-                    widthFactor = cursor.CharScaleWidth
-                    # Есть 4 варианта оформления первого листа
-                    # в виде 4-х стилей страницы.
-                    # Поля форматной рамки хранятся в нижнем колонтитуле
-                    # и для каждого стиля имеется свой набор полей.
-                    # При редактировании, значения полей нужно синхронизировать
-                    # между собой.
-                    for firstPageVariant in "1234":
-                        if currentFrame.Name[5] == firstPageVariant:
-                            continue
-                        otherName = "Перв.{}: {}".format(firstPageVariant, name)
-                        if otherName in doc.TextFrames:
-                            otherFrame = doc.TextFrames[otherName]
-                            otherFrame.String = text
-                            otherCursor = otherFrame.createTextCursor()
-                            otherCursor.gotoEnd(True)
-                            otherCursor.CharHeight = fontSize
-                            otherCursor.CharScaleWidth = widthFactor
-                    # А также, обновить поля на последующих листах
-                    common.syncCommonFields()
+                                itemCursor.goRight(len(line), True)
+                                itemCursor.CharScaleWidth = widthFactor
+                                itemCursor.collapseToEnd()
 
-        doc.UndoManager.unlock()
-        doc.addModifyListener(self)
+                # Синхронизация содержимого полей в разных стилях страниц.
+                if currentFrame is not None \
+                    and currentFrame.Name.startswith("Перв.") \
+                    and not currentFrame.Name.endswith("7 Лист") \
+                    and not currentFrame.Name.endswith("8 Листов"):
+                        # Обновить только текущую графу
+                        name = currentFrame.Name[8:]
+                        text = currentFrame.String
+                        cursor = currentFrame.createTextCursor()
+                        fontSize = cursor.CharHeight
+                        widthFactor = cursor.CharScaleWidth
+                        # Есть 4 варианта оформления первого листа
+                        # в виде 4-х стилей страницы.
+                        # Поля форматной рамки хранятся в нижнем колонтитуле
+                        # и для каждого стиля имеется свой набор полей.
+                        # При редактировании, значения полей нужно синхронизировать
+                        # между собой.
+                        for firstPageVariant in "1234":
+                            if currentFrame.Name[5] == firstPageVariant:
+                                continue
+                            otherName = "Перв.{}: {}".format(firstPageVariant, name)
+                            if otherName in doc.TextFrames:
+                                otherFrame = doc.TextFrames[otherName]
+                                otherFrame.String = text
+                                otherCursor = otherFrame.createTextCursor()
+                                otherCursor.gotoEnd(True)
+                                otherCursor.CharHeight = fontSize
+                                otherCursor.CharScaleWidth = widthFactor
+                        # А также, обновить поля на последующих листах
+                        common.syncCommonFields()
+        finally:
+            # Обработчик должен быть восстановлен даже в случае ошибки,
+            # иначе документ перестанет реагировать на изменения.
+            doc.UndoManager.unlock()
+            doc.addModifyListener(self)
 
 
 def importEmbeddedModules(*args):
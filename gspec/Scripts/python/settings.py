@@ -161,7 +161,10 @@ def setup(*args):
 файл списка цепей KiCad.
 Поддерживаются файлы с расширением
 *.net (Pcbnew) и с расширением
-*.xml (вспомогательный)."""
+*.xml (вспомогательный).
+Для KiCad 6 и новее можно указать
+файл корневого листа схемы
+(*.kicad_sch)."""
     pageModel0.insertByName("Label00", labelModel00)
 
     buttonModel00 = pageModel0.createInstance(
@@ -1845,7 +1848,10 @@ class Button00ActionListener(unohelper.Base, XActionListener):
         editControl = self.dialog.getControl("Tabs").getControl("Page0").getControl("EditControl00")
         source = common.showFilePicker(
             editControl.Text,
-            **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+            **{
+                "Схема или список цепей KiCad": "*.kicad_sch;*.net;*.xml",
+                "Все файлы": "*.*"
+            }
         )
         if source is not None:
             editControl.Text = source
@@ -95,7 +95,7 @@ def fill(*args):
     """
     if common.isThreadWorking():
         return
-    schematic = common.getSchematicData()
+    schematic = common.getSchematicData(headerOnly=True)
     if schematic is None:
         return
     doc = XSCRIPTCONTEXT.getDocument()
@@ -153,30 +153,22 @@ class IndexBuildingThread(threading.Thread):
         # --------------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
-
-        def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
-
-        def isRowEmpty(row):
-            lastCol = len(table.Rows[row].TableColumnSeparators)
-            rowCells = table.getCellRangeByPosition(
-                0, # left
-                row, # top
-                lastCol, # right
-                row # bottom
-            )
-            dataIsPresent = any(rowCells.DataArray[0])
-            return not dataIsPresent
+            for _ in range(count):
+                writer.append(common.TableRow())
+
+        def getFontSize(col, isTitle=False):
+            # Размер шрифта определяется стилем абзаца графы
+            # (для заголовка -- стилем заголовка).
+            if col == 1 and isTitle:
+                return fontSizes["Наименование (заголовок)"]
+            return fontSizes[common.TABLE_COLUMN_STYLES[col]]
 
         def fillRow(values, isTitle=False):
             colWidth = (19, 109, 9, 44)
             extraRow = [""] * len(values)
-            extremeWidthFactor = config.getint("doc", "extreme width factor")
-            doc.lockControllers()
+            extremeWidthFactor = settings.doc.extremeWidthFactor
+            row = common.TableRow(values, isTitle)
+            values = row.values
             for col in range(len(values)):
                 if values[col] == "":
                     continue
@@ -187,7 +179,7 @@ class IndexBuildingThread(threading.Thread):
                     extraRow[col] = text[(lfPos + 1):]
                 widthFactor = textwidth.getWidthFactor(
                     values[col],
-                    getFontSize(col),
+                    getFontSize(col, isTitle),
                     colWidth[col]
                 )
                 if widthFactor < extremeWidthFactor:
@@ -206,20 +198,14 @@ class IndexBuildingThread(threading.Thread):
                         extraRow[col] = text[(pos + 1):] + '\n' + extraRow[col]
                         widthFactor = textwidth.getWidthFactor(
                             values[col],
-                            getFontSize(col),
+                            getFontSize(col, isTitle),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 1 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
-                cell.String = values[col]
-            doc.unlockControllers()
-
-            gotoNextRow()
+                    row.paraStyles[col] = "Наименование (заголовок)"
+                row.widthFactors[col] = widthFactor
+            writer.append(row)
+
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
@@ -227,7 +213,9 @@ class IndexBuildingThread(threading.Thread):
         # Начало построения таблицы
         # --------------------------------------------------------------------
         try:
-            schematic = common.getSchematicData()
+            # Параметры считываются один раз на всё построение
+            settings = config.getSnapshot()
+            schematic = common.getSchematicData(settings=settings)
             if schematic is None:
                 return
             doc = XSCRIPTCONTEXT.getDocument()
@@ -236,16 +224,25 @@ class IndexBuildingThread(threading.Thread):
             table = doc.TextTables["Перечень_элементов"]
             compGroups = schematic.getGroupedComponents()
             prevGroup = None
-            emptyRowsRef = config.getint("doc", "empty rows between diff ref")
-            emptyRowsType = config.getint("doc", "empty rows between diff type")
+            emptyRowsRef = settings.doc.emptyRowsBetweenDiffRef
+            emptyRowsType = settings.doc.emptyRowsBetweenDiffType
+            # Последняя строка таблицы -- пустая строка с ненарушенным
+            # форматированием. На её основе будут созданы новые строки.
+            # По окончанию, эта строка будет удалена.
             self.currentRow = table.Rows.Count - 1
-            # В процессе заполнения перечня, в конце таблицы всегда должна
-            # оставаться пустая строка с ненарушенным форматированием.
-            # На её основе будут создаваться новые строки.
-            # По окончанию, последняя строка будет удалена.
-            table.Rows.insertByIndex(self.currentRow, 1)
+            # Строки перечня сначала формируются в памяти,
+            # а затем записываются в таблицу за один раз.
+            writer = common.TableWriter(table, self.currentRow)
+            # Новые строки создаются на основе строки-образца
+            # и имеют её высоту.
+            rowHeight = table.Rows[self.currentRow].Height
+            # Размеры шрифта граф считываются из стилей абзаца
+            # один раз за всё построение.
+            fontSizes = common.getFontSizes(
+                common.TABLE_COLUMN_STYLES + ("Наименование (заголовок)",)
+            )
 
-            progressTotal = 3
+            progressTotal = 1
             for group in compGroups:
                 progressTotal += len(group)
             progressDialog = ProgressDialog(
@@ -260,11 +257,9 @@ class IndexBuildingThread(threading.Thread):
                         emptyRows = emptyRowsRef
                     else:
                         emptyRows = emptyRowsType
-                    doc.lockControllers()
                     gotoNextRow(emptyRows)
-                    doc.unlockControllers()
                 if len(group) == 1 \
-                    and not config.getboolean("doc", "every group has title"):
+                    and not settings.doc.everyGroupHasTitle:
                         compRef = group[0].getRefRangeString()
                         compType = group[0].getIndexValue("type", singular=True)
                         compName = group[0].getIndexValue("name")
@@ -286,7 +281,7 @@ class IndexBuildingThread(threading.Thread):
                                 ["", title],
                                 isTitle=True
                             )
-                    if config.getboolean("doc", "empty row after group title"):
+                    if settings.doc.emptyRowAfterGroupTitle:
                         gotoNextRow()
                     for compRange in group:
                         compRef = compRange.getRefRangeString()
@@ -306,57 +301,25 @@ class IndexBuildingThread(threading.Thread):
                         progressDialog.stepUp()
                 prevGroup = group
 
-            table.Rows.removeByIndex(self.currentRow, 2)
-
-            progressDialog.stepUp()
-
-            if config.getboolean("doc", "prohibit titles at bottom"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount
-                while pos < table.Rows.Count:
-                    offset = 0
-                    # Если внизу страницы пустая строка -
-                    # подняться вверх к строке с данными.
-                    while isRowEmpty(pos - offset) and pos > (offset + 1):
-                        offset += 1
-                    cell = table.getCellByPosition(1, pos - offset)
-                    cellCursor = cell.createTextCursor()
-                    if cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                        and cell.String != "":
-                            offset += 1
-                            while pos > offset:
-                                cell = table.getCellByPosition(1, pos - offset)
-                                cellCursor = cell.createTextCursor()
-                                if cellCursor.ParaStyleName != "Наименование (заголовок)" \
-                                    or cell.String == "":
-                                        doc.lockControllers()
-                                        table.Rows.insertByIndex(pos - offset, offset)
-                                        doc.unlockControllers()
-                                        break
-                                offset += 1
-                    pos += otherRowCount
-
-            progressDialog.stepUp()
-
-            if config.getboolean("doc", "prohibit empty rows at top"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount + 1
-                while pos < table.Rows.Count:
-                    doc.lockControllers()
-                    while pos < table.Rows.Count and isRowEmpty(pos):
-                        table.Rows.removeByIndex(pos, 1)
-                    pos += otherRowCount
-                    doc.unlockControllers()
+            # Строки размещаются по листам до записи в таблицу
+            common.paginateRows(
+                writer.rows,
+                self.currentRow,
+                settings.doc.prohibitTitlesAtBottom,
+                settings.doc.prohibitEmptyRowsAtTop
+            )
+            writer.flush()
+            table.Rows.removeByIndex(writer.rowIndex, 1)
 
             progressDialog.stepUp()
 
-            common.updateTableRowsHeight()
+            common.updateTableRowsHeight(rowHeight=rowHeight)
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "append rev table"):
+            if settings.doc.appendRevTable:
                 pageCount = doc.CurrentController.PageCount
-                if pageCount > config.getint("doc", "pages rev table"):
+                if pageCount > settings.doc.pagesRevTable:
                     common.appendRevTable()
 
         except StopException:
@@ -91,6 +91,14 @@ ITEM_WIDTHS = {
     "ТабТИ.E": 10,
 }
 
+# Стили абзацев граф основной таблицы
+TABLE_COLUMN_STYLES = (
+    "Поз. обозначение",
+    "Наименование",
+    "Кол.",
+    "Примечание"
+)
+
 SKIP_MODIFY_EVENTS = False
 
 def isThreadWorking():
@@ -173,7 +181,8 @@ def getSourceFileName():
     Попытаться найти файл с данными о схеме в текущем каталоге.
     В случае неудачи, показать диалоговое окно выбора файла.
 
-    Для KiCad источником данных о схеме является список цепей.
+    Для KiCad источником данных о схеме является список цепей или,
+    для KiCad 6 и новее, файл корневого листа схемы.
 
     Возвращаемое значение -- полное имя файла или None, если файл
         не найден или не выбран.
@@ -191,6 +200,8 @@ def getSourceFileName():
         for fileName in os.listdir(sourceDir):
             if fileName.endswith(".pro"):
                 sourceName = fileName.replace(".pro", ".net")
+            elif fileName.endswith(".kicad_pro"):
+                sourceName = fileName.replace(".kicad_pro", ".kicad_sch")
         if sourceName:
             sourcePath = os.path.join(sourceDir, sourceName)
             if os.path.exists(sourcePath):
@@ -199,7 +210,10 @@ def getSourceFileName():
                 return sourcePath
     sourcePath = showFilePicker(
         os.path.join(sourceDir, sourceName),
-        **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+        **{
+            "Схема или список цепей KiCad": "*.kicad_sch;*.net;*.xml",
+            "Все файлы": "*.*"
+        }
     )
     if sourcePath is not None:
         config.set("doc", "source", sourcePath)
@@ -207,12 +221,19 @@ def getSourceFileName():
         return sourcePath
     return None
 
-def getSchematicData():
+def getSchematicData(headerOnly=False, settings=None):
     """Подготовить необходимые данные о схеме.
 
     Выбрать из файла данные о компонентах и данные для заполнения
     основной надписи.
 
+    Аргументы:
+    headerOnly (bool) -- выбрать только данные для заполнения основной
+        надписи; файл считывается лишь до основной надписи корневого
+        листа, компоненты не обрабатываются;
+    settings (config.Snapshot) -- снимок параметров, с которым
+        строится документ; если не указан, используется текущий.
+
     Возвращаемое значение -- объект класса Schematic или None, если
         файл не найден или данные в файле отсутствуют.
 
@@ -226,7 +247,7 @@ def getSchematicData():
         #)
         return None
     try:
-        return schematic.Schematic(sourceFileName)
+        return schematic.Schematic(sourceFileName, headerOnly, settings)
     except kicadnet.ParseException as error:
         showMessage(
             "Не удалось получить данные о схеме.\n\n" \
@@ -242,6 +263,152 @@ def getSchematicData():
         )
     return None
 
+def getFontSizes(styleNames):
+    """Получить размеры шрифта стилей абзаца.
+
+    Аргументы:
+    styleNames -- названия стилей абзаца.
+
+    Возвращаемое значение (dict) -- размеры шрифта (в пунктах),
+        где ключ -- название стиля.
+
+    """
+    doc = XSCRIPTCONTEXT.getDocument()
+    paraStyles = doc.StyleFamilies["ParagraphStyles"]
+    fontSizes = {}
+    for styleName in styleNames:
+        if styleName not in fontSizes:
+            fontSizes[styleName] = paraStyles[styleName].CharHeight
+    return fontSizes
+
+
+class TableRow():
+    """Строка основной таблицы.
+
+    Таблица сначала целиком формируется в памяти в виде списка строк,
+    а затем записывается в документ за один раз. Это позволяет избежать
+    множества медленных обращений к ячейкам через uno-интерфейс.
+
+    Атрибуты:
+    values -- список значений ячеек;
+    widthFactors -- список коэффициентов сжатия шрифта ячеек (в процентах);
+    paraStyles -- словарь стилей абзацев ячеек, которые отличаются от
+        стиля графы ({номер графы: стиль});
+    isTitle -- признак строки заголовка;
+    posCol -- номер графы с полем номера позиции (None -- поле отсутствует);
+    posIncrement -- приращение номера позиции;
+    posWidthFactor -- коэффициент сжатия шрифта номера позиции.
+
+    """
+
+    def __init__(self, values=(), isTitle=False):
+        self.values = list(values)
+        self.widthFactors = [100] * len(self.values)
+        self.paraStyles = {}
+        self.isTitle = isTitle
+        self.posCol = None
+        self.posIncrement = 0
+        self.posWidthFactor = 100
+
+    def isEmpty(self):
+        """Является ли строка пустой (без текста и номера позиции)."""
+        return not any(self.values) and self.posCol is None
+
+
+class TableWriter():
+    """Пакетная запись строк в основную таблицу.
+
+    Строки (TableRow) накапливаются в памяти и записываются методом
+    flush() непрерывным блоком: все строки блока вставляются одним вызовом
+    insertByIndex перед строкой-образцом (и наследуют её форматирование),
+    а текст ячеек записывается одним присваиванием DataArray.
+    По отдельности обрабатываются только ячейки, стиль абзаца или сжатие
+    шрифта которых отличаются от стандартных, и поля номеров позиций.
+
+    """
+
+    def __init__(self, table, rowIndex):
+        self.table = table
+        # Номер строки-образца, перед которой вставляются новые строки
+        self.rowIndex = rowIndex
+        # Строки, ожидающие записи
+        self.rows = []
+
+    def append(self, row):
+        """Добавить строку (TableRow) в очередь на запись."""
+        self.rows.append(row)
+
+    def flush(self):
+        """Записать накопленные строки в таблицу.
+
+        После записи строка-образец смещается вниз, поэтому последующие
+        строки будут добавлены после уже записанных.
+
+        Возвращаемое значение (int) -- количество записанных строк.
+
+        """
+        rows = self.rows
+        if not rows:
+            return 0
+        doc = XSCRIPTCONTEXT.getDocument()
+        table = self.table
+        firstRow = self.rowIndex
+        lastRow = firstRow + len(rows) - 1
+        doc.lockControllers()
+        table.Rows.insertByIndex(firstRow, len(rows))
+        lastCol = len(table.Rows[firstRow].TableColumnSeparators)
+        # Параметры символов необходимо устанавливать после
+        # параметров абзаца и до записи текста!
+        for rowIndex, row in enumerate(rows, firstRow):
+            for col in range(len(row.values)):
+                paraStyle = row.paraStyles.get(col)
+                widthFactor = row.widthFactors[col]
+                if paraStyle is None and widthFactor == 100:
+                    continue
+                cell = table.getCellByPosition(col, rowIndex)
+                cellCursor = cell.createTextCursor()
+                if paraStyle is not None:
+                    cellCursor.ParaStyleName = paraStyle
+                cellCursor.CharScaleWidth = widthFactor
+        dataArray = []
+        for row in rows:
+            rowValues = row.values + [""] * (lastCol + 1 - len(row.values))
+            dataArray.append(tuple(rowValues))
+        cellRange = table.getCellRangeByPosition(
+            0, # left
+            firstRow, # top
+            lastCol, # right
+            lastRow # bottom
+        )
+        cellRange.DataArray = tuple(dataArray)
+        # Поля номеров позиций вставляются после записи текста,
+        # иначе они будут удалены.
+        posFieldMaster = None
+        for rowIndex, row in enumerate(rows, firstRow):
+            if row.posCol is None:
+                continue
+            if posFieldMaster is None:
+                if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
+                    posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
+                else:
+                    posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
+                    posFieldMaster.SubType = 0
+                    posFieldMaster.Name = "Позиция"
+            posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
+            posField.Content = "Позиция+" + str(row.posIncrement)
+            posField.attachTextFieldMaster(posFieldMaster)
+            cell = table.getCellByPosition(row.posCol, rowIndex)
+            cellCursor = cell.createTextCursor()
+            cell.Text.insertTextContent(cellCursor, posField, False)
+            cellCursor.gotoStart(False)
+            cellCursor.gotoEnd(True)
+            cellCursor.CharScaleWidth = row.posWidthFactor
+        doc.unlockControllers()
+        self.rowIndex = lastRow + 1
+        self.rows = []
+        return len(rows)
+
+
 def getFirstPageInfo():
     """Информация о первом листе.
 
@@ -260,7 +427,68 @@ def getFirstPageInfo():
         return (firstPageVariant, firstRowCount, otherRowCount)
     return ("?", 0, 0)
 
-def getTableRowHeight(rowIndex):
+def paginateRows(rows, firstRowIndex, prohibitTitlesAtBottom, prohibitEmptyRowsAtTop):
+    """Разместить строки основной таблицы по листам.
+
+    Строки обрабатываются в памяти до записи в таблицу, исходя из
+    количества строк на листах (см. getFirstPageInfo()). Заголовки,
+    оказавшиеся внизу листа, переносятся на следующий лист вставкой
+    пустых строк перед ними, а пустые строки вверху листа удаляются.
+
+    Аргументы:
+    rows (list) -- строки таблицы (TableRow), список изменяется на месте;
+    firstRowIndex (int) -- номер строки таблицы, в которую будет записана
+        первая строка списка;
+    prohibitTitlesAtBottom (bool) -- запретить заголовки внизу листа;
+    prohibitEmptyRowsAtTop (bool) -- запретить пустые строки вверху листа.
+
+    """
+    _, firstRowCount, otherRowCount = getFirstPageInfo()
+    if otherRowCount == 0:
+        # Неизвестный стиль первого листа
+        return
+
+    def isRowEmpty(index):
+        # Строки до firstRowIndex (заголовок таблицы) не пустые
+        if index < firstRowIndex:
+            return False
+        return rows[index - firstRowIndex].isEmpty()
+
+    def isRowTitle(index):
+        if index < firstRowIndex:
+            return False
+        row = rows[index - firstRowIndex]
+        return row.isTitle and any(row.values)
+
+    if prohibitTitlesAtBottom:
+        pos = firstRowCount
+        while pos < firstRowIndex + len(rows):
+            offset = 0
+            # Если внизу страницы пустая строка -
+            # подняться вверх к строке с данными.
+            while isRowEmpty(pos - offset) and pos > (offset + 1):
+                offset += 1
+            if isRowTitle(pos - offset):
+                offset += 1
+                while pos > offset:
+                    if not isRowTitle(pos - offset):
+                        # Заголовки, которые не помещаются на одном листе,
+                        # переносить бесполезно.
+                        if offset < otherRowCount:
+                            index = max(pos - offset - firstRowIndex, 0)
+                            rows[index:index] = [TableRow() for _ in range(offset)]
+                        break
+                    offset += 1
+            pos += otherRowCount
+
+    if prohibitEmptyRowsAtTop:
+        pos = firstRowCount + 1
+        while pos < firstRowIndex + len(rows):
+            while pos < firstRowIndex + len(rows) and isRowEmpty(pos):
+                del rows[pos - firstRowIndex]
+            pos += otherRowCount
+
+def getTableRowHeight(rowIndex, firstPageInfo=None):
     """Вычислить высоту строки основной таблицы.
 
     Высота строк подбирается так, чтобы нижнее обрамление последней строки
@@ -268,13 +496,17 @@ def getTableRowHeight(rowIndex):
 
     Аргументы:
 
-    rowIndex -- номер строки.
+    rowIndex -- номер строки;
+    firstPageInfo -- результат getFirstPageInfo(); если не задан,
+        определяется заново.
 
     Возвращаемое значение -- высота строки таблицы.
 
     """
     height = 800
-    firstPageVariant, firstRowCount, otherRowCount = getFirstPageInfo()
+    if firstPageInfo is None:
+        firstPageInfo = getFirstPageInfo()
+    firstPageVariant, firstRowCount, otherRowCount = firstPageInfo
     if firstPageVariant == "?":
         return height
     if rowIndex <= firstRowCount:
@@ -293,20 +525,65 @@ def getTableRowHeight(rowIndex):
         height = 801
     return height
 
-def updateTableRowsHeight():
+def updateTableRowsHeight(rowCountChange=None, rowHeight=None):
     """Обновить высоту строк таблицы.
 
     Высота строк подстраивается так, чтобы нижнее обрамление последней строки
     листа совпадало с верхней линией основной надписи.
+    Значение устанавливается только тем строкам, высота которых отличается
+    от требуемой.
+
+    Высота строки зависит только от её положения относительно границ листов.
+    Если после предыдущего обновления количество строк изменилось на N,
+    то неверная высота может быть только у строк первого листа и у строк,
+    отстоящих от границ последующих листов не более чем на N, поэтому
+    проверяются только они.
+
+    Аргументы:
+
+    rowCountChange -- на сколько строк изменилось количество строк таблицы
+        после предыдущего обновления; если не задано, проверяются все строки;
+    rowHeight -- высота, которую имеют все строки таблицы (например, сразу
+        после построения, когда строки созданы на основе строки-образца);
+        если задана, высота строк не считывается.
 
     """
     doc = XSCRIPTCONTEXT.getDocument()
     if "Перечень_элементов" not in doc.TextTables:
         return
     table = doc.TextTables["Перечень_элементов"]
+    firstPageInfo = getFirstPageInfo()
+    firstRowCount = firstPageInfo[1]
+    otherRowCount = firstPageInfo[2]
+    rows = table.Rows
+    rowCount = rows.Count
+    if rowCountChange is None or otherRowCount == 0:
+        rowIndexes = range(1, rowCount)
+    else:
+        # Строки первого листа и строки вблизи границ последующих листов
+        rowIndexes = set(range(1, min(firstRowCount + rowCountChange + 1, rowCount)))
+        boundary = firstRowCount + otherRowCount
+        while boundary - rowCountChange < rowCount:
+            rowIndexes.update(range(
+                max(boundary - rowCountChange, 1),
+                min(boundary + rowCountChange + 1, rowCount)
+            ))
+            boundary += otherRowCount
+        rowIndexes = sorted(rowIndexes)
     doc.lockControllers()
-    for rowIndex in range(1, table.Rows.Count):
-        table.Rows[rowIndex].Height = getTableRowHeight(rowIndex)
+    for rowIndex in rowIndexes:
+        height = getTableRowHeight(rowIndex, firstPageInfo)
+        row = None
+        currentHeight = rowHeight
+        if currentHeight is None:
+            row = rows.getByIndex(rowIndex)
+            currentHeight = row.Height
+        # Высота хранится в твипах, поэтому считанное значение
+        # может отличаться от заданного на единицу.
+        if abs(currentHeight - height) > 1:
+            if row is None:
+                row = rows.getByIndex(rowIndex)
+            row.Height = height
     doc.unlockControllers()
 
 def rebuildTable():
@@ -6,6 +6,7 @@
 """
 
 import os
+import re
 import sys
 from configparser import ConfigParser
 import tempfile
@@ -21,54 +22,62 @@ def init(scriptcontext):
 
 SETTINGS = ConfigParser()
 
+# Номер версии параметров. Увеличивается при каждом изменении параметров,
+# что позволяет определить устаревание значений, вычисленных на их основе.
+GENERATION = 0
+
+# Значения параметров по умолчанию
+DEFAULTS = {
+    "doc": {
+        "source": "",
+        "ref separator": "-",
+        "add units": "yes",
+        "space before units": "no",
+        "concatenate same name groups": "no",
+        "title with doc": "no",
+        "every group has title": "no",
+        "empty row after group title": "no",
+        "empty rows between diff ref": 1,
+        "empty rows between diff type": 0,
+        "prohibit titles at bottom": "no",
+        "prohibit empty rows at top": "no",
+        "extreme width factor": 80,
+        "append rev table": "no",
+        "pages rev table": 3,
+        "footprint only": "yes",
+        "split row by \\n": "no",
+    },
+    "fields": {
+        "type": "Тип",
+        "name": "Наименование",
+        "doc": "Документ",
+        "comment": "Примечание",
+        "adjustable": "Подбирают при регулировании",
+        "excluded": "",
+    },
+    "stamp": {
+        "convert doc title": "yes",
+        "convert doc id": "yes",
+        "fill first usage": "yes",
+    },
+    "settings": {
+        "pos x": "100",
+        "pos y": "100",
+        "set view options": "yes",
+        "compatibility mode": "no",
+        "netlist cache": "no",
+    }
+}
+
 def load():
     """Загрузить настройки.
 
     Считать параметры работы из файла.
 
     """
-    SETTINGS.read_dict(
-        {
-            "doc": {
-                "source": "",
-                "ref separator": "-",
-                "add units": "yes",
-                "space before units": "no",
-                "concatenate same name groups": "no",
-                "title with doc": "no",
-                "every group has title": "no",
-                "empty row after group title": "no",
-                "empty rows between diff ref": 1,
-                "empty rows between diff type": 0,
-                "prohibit titles at bottom": "no",
-                "prohibit empty rows at top": "no",
-                "extreme width factor": 80,
-                "append rev table": "no",
-                "pages rev table": 3,
-                "footprint only": "yes",
-                "split row by \\n": "no",
-            },
-            "fields": {
-                "type": "Тип",
-                "name": "Наименование",
-                "doc": "Документ",
-                "comment": "Примечание",
-                "adjustable": "Подбирают при регулировании",
-                "excluded": "",
-            },
-            "stamp": {
-                "convert doc title": "yes",
-                "convert doc id": "yes",
-                "fill first usage": "yes",
-            },
-            "settings": {
-                "pos x": "100",
-                "pos y": "100",
-                "set view options": "yes",
-                "compatibility mode": "no",
-            }
-        }
-    )
+    global GENERATION
+    GENERATION += 1
+    SETTINGS.read_dict(DEFAULTS)
 
     doc = XSCRIPTCONTEXT.getDocument()
     ctx = XSCRIPTCONTEXT.getComponentContext()
@@ -127,35 +136,147 @@ def getint(section, option):
 
 def set(section, option, value):
     """Установить значение "value" параметру "option" из раздела "section"."""
+    global GENERATION
+    GENERATION += 1
     return SETTINGS.set(section, option, value)
 
 def setboolean(section, option, value):
     """Установить булево значение "value" параметру "option" из раздела "section"."""
+    global GENERATION
+    GENERATION += 1
     yesno = "yes" if bool(value) else "no"
     return SETTINGS.set(section, option, yesno)
 
-def loadFromKicadbom2spec():
-    """Загрузить настройки kicadbom2spec.
+def _getAttributeName(name):
+    """Преобразовать название раздела или параметра в имя атрибута.
 
-    Считать параметры приложения kicadbom2spec.
+    Например: "add units" -> "addUnits", "split row by \\n" -> "splitRowByN".
 
-    Возвращаемое значение -- ConfigParser или None в случае ошибки.
+    """
+    words = re.findall(r"[^\W_]+", name)
+    if not words:
+        return ""
+    attrName = words[0].lower()
+    for word in words[1:]:
+        attrName += word[0].upper() + word[1:]
+    return attrName
+
+
+class SnapshotSection():
+    """Раздел снимка параметров.
+
+    Значения доступны как атрибуты (section.addUnits) и по названию
+    параметра (section["add units"]). Изменение значений не допускается.
 
     """
-    settings = None
-    configPath = ""
+
+    def __init__(self, values):
+        object.__setattr__(self, "_values", values)
+        for option, value in values.items():
+            attrName = _getAttributeName(option)
+            if attrName.isidentifier():
+                object.__setattr__(self, attrName, value)
+
+    def __getitem__(self, option):
+        return self._values[option]
+
+    def __contains__(self, option):
+        return option in self._values
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Снимок параметров не может быть изменён")
+
+    __delattr__ = __setattr__
+
+
+class Snapshot():
+    """Снимок параметров работы.
+
+    Неизменяемая копия параметров на момент создания, значения которой
+    приведены к типу значения по умолчанию: "yes"/"no" -> bool,
+    int -> int, остальные -> str. Разделы доступны как атрибуты
+    (snapshot.doc, snapshot.compSortFields) и по названию
+    (snapshot["comp sort fields"]).
+
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "generation", GENERATION)
+        sections = {}
+        for section, defaults in DEFAULTS.items():
+            values = {}
+            for option, default in defaults.items():
+                try:
+                    if isinstance(default, int):
+                        value = SETTINGS.getint(section, option)
+                    elif default in ("yes", "no"):
+                        value = SETTINGS.getboolean(section, option)
+                    else:
+                        value = SETTINGS.get(section, option)
+                except ValueError:
+                    # Некорректное значение в файле параметров
+                    if default in ("yes", "no"):
+                        value = default == "yes"
+                    else:
+                        value = default
+                values[option] = value
+            sections[section] = SnapshotSection(values)
+            object.__setattr__(self, _getAttributeName(section), sections[section])
+        object.__setattr__(self, "_sections", sections)
+
+    def __getitem__(self, section):
+        return self._sections[section]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Снимок параметров не может быть изменён")
+
+    __delattr__ = __setattr__
+
+
+SNAPSHOT = None
+
+def getSnapshot():
+    """Получить снимок параметров работы.
+
+    Снимок создаётся заново только после изменения параметров, поэтому
+    его следует получать один раз в начале построения и передавать
+    далее, чтобы в циклах использовать обращение к атрибутам вместо
+    разбора значений ConfigParser.
+
+    Возвращаемое значение (Snapshot) -- снимок текущих параметров.
+
+    """
+    global SNAPSHOT
+    snapshot = SNAPSHOT
+    if snapshot is None or snapshot.generation != GENERATION:
+        snapshot = Snapshot()
+        SNAPSHOT = snapshot
+    return snapshot
+
+def _getKicadbom2specPath():
+    """Получить полное имя файла параметров kicadbom2spec."""
     if sys.platform == "win32":
-        configPath = os.path.join(
+        return os.path.join(
             os.environ["APPDATA"],
             "kicadbom2spec",
             "settings.ini"
         )
-    else:
-        configPath = os.path.join(
-            os.path.expanduser("~/.config"),
-            "kicadbom2spec",
-            "settings.ini"
-        )
+    return os.path.join(
+        os.path.expanduser("~/.config"),
+        "kicadbom2spec",
+        "settings.ini"
+    )
+
+def loadFromKicadbom2spec():
+    """Загрузить настройки kicadbom2spec.
+
+    Считать параметры приложения kicadbom2spec.
+
+    Возвращаемое значение -- ConfigParser или None в случае ошибки.
+
+    """
+    settings = None
+    configPath = _getKicadbom2specPath()
     if os.path.isfile(configPath):
         settings = ConfigParser()
         try:
@@ -164,6 +285,49 @@ def loadFromKicadbom2spec():
             settings = None
     return settings
 
+# Наименования групп kicadbom2spec и время изменения файла,
+# из которого они были загружены
+KB2S_TYPE_NAMES = ({}, {})
+KB2S_TYPE_NAMES_KEY = None
+
+def getTypeNamesFromKicadbom2spec():
+    """Получить наименования групп из настроек kicadbom2spec.
+
+    Файл параметров считывается повторно только после его изменения.
+    Полученные словари используются совместно, поэтому изменять их
+    не допускается.
+
+    Возвращаемое значение -- кортеж из двух словарей:
+        (единственное число -> множественное число,
+        множественное число -> единственное число).
+
+    """
+    global KB2S_TYPE_NAMES
+    global KB2S_TYPE_NAMES_KEY
+    configPath = _getKicadbom2specPath()
+    try:
+        key = (configPath, os.path.getmtime(configPath))
+    except OSError:
+        key = (configPath, None)
+    if key == KB2S_TYPE_NAMES_KEY:
+        return KB2S_TYPE_NAMES
+    pluralNames = {}
+    singularNames = {}
+    settingsKB2S = None
+    if key[1] is not None:
+        settingsKB2S = loadFromKicadbom2spec()
+    if settingsKB2S is not None:
+        if settingsKB2S.has_section('group names singular'):
+            for index in settingsKB2S.options('group names singular'):
+                if settingsKB2S.has_option('group names plural', index):
+                    singular = settingsKB2S.get('group names singular', index)
+                    plural = settingsKB2S.get('group names plural', index)
+                    pluralNames[singular] = plural
+                    singularNames[plural] = singular
+    KB2S_TYPE_NAMES = (pluralNames, singularNames)
+    KB2S_TYPE_NAMES_KEY = key
+    return KB2S_TYPE_NAMES
+
 
 class ImportIniNotExists(Exception):
     pass
@@ -180,6 +344,7 @@ def importFromDoc(docName):
     импортировать параметры.
 
     """
+    global GENERATION
     if not zipfile.is_zipfile(docName):
         raise ImportBadDoc
 
@@ -201,5 +366,6 @@ def importFromDoc(docName):
                 if param in SETTINGS[section]:
                     SETTINGS[section][param] = iSettings[section][param]
                     pCount += 1
+    GENERATION += 1
     save()
     return pCount
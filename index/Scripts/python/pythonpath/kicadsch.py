@@ -0,0 +1,547 @@
+"""Чтение схемы KiCad 6 и новее (*.kicad_sch).
+
+Модуль позволяет получить данные о схеме непосредственно из файлов
+схемы, без экспорта списка цепей. Обходятся все иерархические листы,
+обозначения компонентов определяются по экземплярам (для каждого
+вхождения листа в иерархию), а результат представляется теми же
+элементами (kicadnet.NetlistItem), что и при чтении списка цепей.
+
+"""
+
+import gc
+import os
+import re
+import sys
+
+kicadnet = None
+
+def init(scriptcontext):
+    global kicadnet
+    kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+
+# Лексемы схемы (с предшествующими пробельными символами):
+# 1 - начало элемента и его имя;
+# 2 - конец элемента;
+# 3 - значение в кавычках (без кавычек, escape-последовательности
+#     не преобразованы; перевод строки внутри значения недопустим);
+# 4 - значение без кавычек;
+# 5 - незакрытая кавычка.
+SCH_TOKENS = re.compile(
+    r'\s*(?:'
+    r'\(([^\s()"]*)'
+    r'|(\))'
+    r'|"((?:[^"\\\n]|\\.)*)"'
+    r'|([^\s()"]+)'
+    r'|(")'
+    r')'
+)
+
+# Обозначение: буквенная часть и номер
+REF_PARTS = re.compile(r"([^0-9]*)([0-9]*)")
+
+SCH_ESCAPES = re.compile(r'\\(.)', re.DOTALL)
+SCH_ESCAPE_CHARS = {'n': '\n', 'r': '\r', 't': '\t'}
+
+# Элементы, которые предшествуют основной надписи в файле схемы
+HEADER_NAMES = frozenset(
+    ("version", "generator", "generator_version", "uuid", "paper", "page")
+)
+
+# Кэш схем в общем хранилище (см. kicadnet.getSharedCache()):
+# полное имя корневого листа -> (размеры и времена изменения всех
+# файлов схемы, данные)
+CACHE_NAME = "schematic1"
+
+# Обязательные поля символа, которые не входят в раздел "fields"
+# списка цепей
+MANDATORY_FIELDS = frozenset(
+    ("Reference", "Value", "Footprint", "Datasheet", "Description")
+)
+
+
+class SheetFile():
+    """Данные одного файла схемы.
+
+    Хранятся только сведения, необходимые для построения компонентов:
+    основная надпись, символы, вложенные листы, экземпляры символов
+    (KiCad 6) и описания библиотечных символов.
+
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        status = os.stat(fileName)
+        self.size = status.st_size
+        self.mtime = status.st_mtime_ns
+        self.uuid = ""
+        self.titleBlock = None
+        self.symbols = []
+        self.sheets = []
+        self.symbolInstances = {}
+        self.descriptions = {}
+        with open(fileName, encoding="utf-8") as schematic:
+            content = schematic.read()
+        for element in _iterElements(content):
+            name = element[0]
+            if name == "symbol":
+                self.symbols.append(element)
+            elif name == "sheet":
+                self.sheets.append(element)
+            elif name == "lib_symbols":
+                for libSymbol in element[1:]:
+                    if isinstance(libSymbol, list) \
+                        and libSymbol[0] == "symbol" \
+                        and len(libSymbol) > 1:
+                            properties = _getProperties(libSymbol)
+                            self.descriptions[libSymbol[1]] = properties.get(
+                                "ki_description",
+                                properties.get("Description", "")
+                            )
+            elif name == "title_block":
+                self.titleBlock = element
+            elif name == "uuid":
+                self.uuid = _getText(element)
+            elif name == "symbol_instances":
+                for path in element[1:]:
+                    if isinstance(path, list) and len(path) > 1:
+                        self.symbolInstances[path[1]] = path
+
+
+def _error(content, offset, message):
+    line = content.count('\n', 0, offset) + 1
+    pos = offset - content.rfind('\n', 0, offset)
+    return kicadnet.ParseException(line, pos, message)
+
+
+def _iterElements(content):
+    """Перебор элементов верхнего уровня схемы.
+
+    Элемент представляется списком [имя, значение или элемент, ...].
+    Вложенность отслеживается стеком, элементы верхнего уровня
+    возвращаются по мере считывания и не сохраняются в корневом элементе.
+
+    Аргументы:
+    content (str) -- содержимое файла схемы.
+
+    """
+    stack = []
+    for match in SCH_TOKENS.finditer(content):
+        kind = match.lastindex
+        if kind == 1:
+            name = match.group(1)
+            if name == "":
+                raise _error(content, match.end(), "Элемент не имеет имени!")
+            if not stack:
+                if name != "kicad_sch":
+                    raise _error(
+                        content,
+                        match.end(),
+                        "Файл не является файлом схемы KiCad (*.kicad_sch)!"
+                    )
+            element = [name]
+            if len(stack) > 1:
+                stack[-1].append(element)
+            stack.append(element)
+        elif kind == 2:
+            if not stack:
+                raise _error(
+                    content,
+                    match.end(),
+                    "Элемент должен начинаться символом '('!"
+                )
+            element = stack.pop()
+            if len(stack) == 1:
+                yield element
+            elif not stack:
+                return
+        elif kind == 5:
+            raise _error(
+                content,
+                match.end(),
+                "Значение неожиданно закончилось " \
+                "(должно заканчиваться символом '\"')!"
+            )
+        else:
+            if not stack:
+                raise _error(
+                    content,
+                    match.end(),
+                    "Элемент должен начинаться символом '('!"
+                )
+            text = match.group(kind)
+            if kind == 3 and '\\' in text:
+                text = SCH_ESCAPES.sub(
+                    lambda escape: SCH_ESCAPE_CHARS.get(
+                        escape.group(1),
+                        escape.group(1)
+                    ),
+                    text
+                )
+            stack[-1].append(text)
+    if not stack:
+        raise _error(content, len(content), "Файл не содержит данных!")
+    raise _error(
+        content,
+        len(content),
+        "Элемент неожиданно закончился " \
+        "(должен заканчиваться символом ')')!"
+    )
+
+
+def _getText(element, index=1):
+    if len(element) > index and isinstance(element[index], str):
+        return element[index]
+    return None
+
+
+def _findElement(element, name):
+    for subelement in element:
+        if isinstance(subelement, list) and subelement[0] == name:
+            return subelement
+    return None
+
+
+def _getProperties(element):
+    properties = {}
+    for subelement in element:
+        if isinstance(subelement, list) \
+            and subelement[0] == "property" \
+            and len(subelement) > 2:
+                properties.setdefault(subelement[1], _getText(subelement, 2))
+    return properties
+
+
+def _makeTitleBlock(element, fileName):
+    titleBlock = kicadnet.NetlistItem(None, "title_block")
+    values = {}
+    comments = {}
+    if element is not None:
+        for subelement in element[1:]:
+            if not isinstance(subelement, list):
+                continue
+            if subelement[0] == "comment":
+                number = _getText(subelement)
+                if number is not None:
+                    comments[number] = _getText(subelement, 2) or ""
+            else:
+                values[subelement[0]] = _getText(subelement)
+    for name in ("title", "company", "rev", "date"):
+        titleBlock.items.append(
+            kicadnet.NetlistItem(titleBlock, name, text=values.get(name))
+        )
+    titleBlock.items.append(
+        kicadnet.NetlistItem(
+            titleBlock,
+            "source",
+            text=os.path.basename(fileName)
+        )
+    )
+    for number in range(1, 10):
+        titleBlock.items.append(
+            kicadnet.NetlistItem(
+                titleBlock,
+                "comment",
+                {"number": str(number), "value": comments.get(str(number), "")}
+            )
+        )
+    return titleBlock
+
+
+def _getInstance(symbol, rootFile, sheetPath):
+    """Найти данные экземпляра символа для вхождения листа в иерархию.
+
+    KiCad 7 и новее хранят экземпляры в самом символе (путь листа,
+    начиная с идентификатора корневого листа), KiCad 6 -- в разделе
+    "symbol_instances" корневого листа (путь листа и идентификатор
+    символа).
+
+    Возвращаемое значение -- элемент "path" или None.
+
+    """
+    instances = _findElement(symbol, "instances")
+    if instances is not None:
+        path = "/" + "/".join([rootFile.uuid] + sheetPath)
+        for project in instances[1:]:
+            if isinstance(project, list) and project[0] == "project":
+                for instance in project[2:]:
+                    if isinstance(instance, list) \
+                        and instance[0] == "path" \
+                        and _getText(instance) == path:
+                            return instance
+    uuid = _findElement(symbol, "uuid")
+    if uuid is not None:
+        path = "/" + "/".join(sheetPath + [_getText(uuid) or ""])
+        return rootFile.symbolInstances.get(path)
+    return None
+
+
+def _makeComponent(symbol, sheetFile, rootFile, sheetPath, sheetNames):
+    properties = _getProperties(symbol)
+    reference = properties.get("Reference") or ""
+    unit = _getText(_findElement(symbol, "unit") or [])
+    value = properties.get("Value")
+    footprint = properties.get("Footprint")
+    instance = _getInstance(symbol, rootFile, sheetPath)
+    if instance is not None:
+        for element in instance[2:]:
+            if not isinstance(element, list):
+                continue
+            if element[0] == "reference":
+                reference = _getText(element) or reference
+            elif element[0] == "unit":
+                unit = _getText(element) or unit
+            elif element[0] == "value":
+                value = _getText(element)
+            elif element[0] == "footprint":
+                footprint = _getText(element)
+    if not reference or reference.startswith('#'):
+        # Символы питания и флаги не входят в список цепей
+        return None, None
+    comp = kicadnet.NetlistItem(None, "comp", {"ref": reference})
+    for name, text in (
+            ("value", value),
+            ("footprint", footprint),
+            ("datasheet", properties.get("Datasheet"))
+        ):
+        comp.items.append(kicadnet.NetlistItem(comp, name, text=text))
+    libId = _getText(_findElement(symbol, "lib_id") or []) or ""
+    libName = _getText(_findElement(symbol, "lib_name") or []) or libId
+    lib, _, part = libId.rpartition(':')
+    description = sheetFile.descriptions.get(libName, "")
+    if properties.get("Description"):
+        description = properties["Description"]
+    comp.items.append(
+        kicadnet.NetlistItem(
+            comp,
+            "libsource",
+            {"lib": lib, "part": part, "description": description}
+        )
+    )
+    fields = kicadnet.NetlistItem(comp, "fields")
+    for name, text in properties.items():
+        if name in MANDATORY_FIELDS or name.startswith("ki_") or not text:
+            continue
+        fields.items.append(
+            kicadnet.NetlistItem(fields, "field", {"name": name}, text=text)
+        )
+    comp.items.append(fields)
+    inBom = _findElement(symbol, "in_bom")
+    if inBom is not None and _getText(inBom) == "no":
+        comp.items.append(
+            kicadnet.NetlistItem(comp, "property", {"name": "exclude_from_bom"})
+        )
+    comp.items.append(
+        kicadnet.NetlistItem(
+            comp,
+            "sheetpath",
+            {
+                "names": "/" + "".join(name + "/" for name in sheetNames),
+                "tstamps": "/" + "".join(uuid + "/" for uuid in sheetPath)
+            }
+        )
+    )
+    uuid = _findElement(symbol, "uuid")
+    comp.items.append(
+        kicadnet.NetlistItem(
+            comp,
+            "tstamp",
+            text=_getText(uuid) if uuid is not None else None
+        )
+    )
+    return comp, unit
+
+
+def _resolveSheetFile(fileName, parentFileName, rootFileName):
+    if os.path.isabs(fileName):
+        return os.path.normpath(fileName)
+    for directory in (
+            os.path.dirname(parentFileName),
+            os.path.dirname(rootFileName)
+        ):
+        path = os.path.normpath(os.path.join(directory, fileName))
+        if os.path.isfile(path):
+            return path
+    return os.path.normpath(
+        os.path.join(os.path.dirname(parentFileName), fileName)
+    )
+
+
+def readTitleBlock(fileName):
+    """Считать основную надпись корневого листа схемы.
+
+    Разбор файла прекращается сразу после основной надписи, вложенные
+    листы не считываются.
+
+    Аргументы:
+    fileName (str) -- полное имя файла корневого листа схемы (*.kicad_sch).
+
+    Возвращаемое значение -- элемент "title_block" (kicadnet.NetlistItem)
+        или None, если основная надпись отсутствует.
+
+    """
+    with open(fileName, encoding="utf-8") as schematic:
+        content = schematic.read()
+    for element in _iterElements(content):
+        if element[0] == "title_block":
+            return _makeTitleBlock(element, fileName)
+        if element[0] not in HEADER_NAMES:
+            break
+    return None
+
+
+def readSchematicData(fileName):
+    """Считать основную надпись и компоненты иерархической схемы.
+
+    Каждый файл схемы считывается и разбирается один раз, даже если
+    лист входит в иерархию несколько раз; компоненты создаются для
+    каждого вхождения листа с обозначениями из соответствующих
+    экземпляров. Части многоэлементных компонентов объединяются
+    в один компонент (основной считается часть с наименьшим номером,
+    поля дополняются значениями из других частей).
+    Результат сохраняется в общем для всех документов кэше
+    (см. kicadnet.getSharedCache()) и используется повторно, пока не
+    изменятся размер или время изменения какого-либо из файлов схемы.
+
+    Аргументы:
+    fileName (str) -- полное имя файла корневого листа схемы (*.kicad_sch).
+
+    Возвращаемое значение -- кортеж (titleBlock, components) в том же
+        виде, что и у kicadnet.readNetlistData().
+
+    """
+    fileName = os.path.abspath(fileName)
+    data = None
+    cache, lock = kicadnet.getSharedCache(CACHE_NAME)
+    with lock:
+        cached = cache.get(fileName)
+    if cached is not None and _getFileStats(cached[0]) == cached[0]:
+        data = cached[1]
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        if data is None:
+            titleBlock, components, fileStats = _readHierarchy(fileName)
+            data = (
+                kicadnet._packItem(titleBlock),
+                [kicadnet._packItem(comp) for comp in components]
+            )
+            with lock:
+                cache[fileName] = (fileStats, data)
+        with lock:
+            if fileName in cache:
+                cache.move_to_end(fileName)
+            while len(cache) > kicadnet.CACHE_SIZE:
+                cache.popitem(last=False)
+        titleBlock, components = data
+        return (
+            kicadnet._unpackItem(titleBlock),
+            [kicadnet._unpackItem(comp) for comp in components]
+        )
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+
+def _getFileStats(fileStats):
+    result = []
+    for fileName, _, _ in fileStats:
+        try:
+            status = os.stat(fileName)
+        except OSError:
+            return None
+        result.append((fileName, status.st_size, status.st_mtime_ns))
+    return tuple(result)
+
+
+def _readHierarchy(fileName):
+    sheetFiles = {fileName: SheetFile(fileName)}
+    rootFile = sheetFiles[fileName]
+    components = {}
+    # Порядок компонентов как в списке цепей: по вхождениям листов,
+    # в пределах листа -- по обозначениям
+    references = []
+    # Стек вхождений листов: (файл, путь, имена листов, файлы-предки)
+    stack = [(rootFile, [], [], (fileName,))]
+    while stack:
+        sheetFile, sheetPath, sheetNames, ancestors = stack.pop()
+        sheetReferences = []
+        for symbol in sheetFile.symbols:
+            comp, unit = _makeComponent(
+                symbol,
+                sheetFile,
+                rootFile,
+                sheetPath,
+                sheetNames
+            )
+            if comp is None:
+                continue
+            reference = comp.attributes["ref"]
+            if reference not in components:
+                components[reference] = (comp, unit)
+                sheetReferences.append(reference)
+                continue
+            mainComp, mainUnit = components[reference]
+            if _unitKey(unit) < _unitKey(mainUnit):
+                mainComp, comp = comp, mainComp
+                components[reference] = (mainComp, unit)
+            _mergeFields(mainComp, comp)
+        references.extend(sorted(sheetReferences, key=_refKey))
+        for sheet in reversed(sheetFile.sheets):
+            properties = _getProperties(sheet)
+            subFileName = properties.get("Sheetfile") \
+                or properties.get("Sheet file")
+            if not subFileName:
+                continue
+            subFileName = _resolveSheetFile(
+                subFileName,
+                sheetFile.fileName,
+                fileName
+            )
+            if subFileName in ancestors:
+                # Рекурсивное вхождение листа в самого себя
+                continue
+            if subFileName not in sheetFiles:
+                sheetFiles[subFileName] = SheetFile(subFileName)
+            uuid = _getText(_findElement(sheet, "uuid") or []) or ""
+            sheetName = properties.get("Sheetname") \
+                or properties.get("Sheet name") \
+                or ""
+            stack.append(
+                (
+                    sheetFiles[subFileName],
+                    sheetPath + [uuid],
+                    sheetNames + [sheetName],
+                    ancestors + (subFileName,)
+                )
+            )
+    fileStats = tuple(
+        (sheetFile.fileName, sheetFile.size, sheetFile.mtime)
+        for sheetFile in sheetFiles.values()
+    )
+    return (
+        _makeTitleBlock(rootFile.titleBlock, rootFile.fileName),
+        [components[reference][0] for reference in references],
+        fileStats
+    )
+
+
+def _refKey(reference):
+    match = REF_PARTS.match(reference)
+    number = int(match.group(2)) if match.group(2) else 0
+    return (match.group(1), number, reference)
+
+
+def _unitKey(unit):
+    try:
+        return int(unit)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _mergeFields(mainComp, comp):
+    mainFields = kicadnet._findItem(mainComp, "fields")
+    names = set(field.attributes["name"] for field in mainFields.items)
+    for field in kicadnet._findItem(comp, "fields").items:
+        if field.attributes["name"] not in names:
+            field.parent = mainFields
+            mainFields.items.append(field)
@@ -161,7 +161,8 @@ def getSourceFileName():
     Попытаться найти файл с данными о схеме в текущем каталоге.
     В случае неудачи, показать диалоговое окно выбора файла.
 
-    Для KiCad источником данных о схеме является список цепей.
+    Для KiCad источником данных о схеме является список цепей или,
+    для KiCad 6 и новее, файл корневого листа схемы.
 
     Возвращаемое значение -- полное имя файла или None, если файл
         не найден или не выбран.
@@ -179,6 +180,8 @@ def getSourceFileName():
         for fileName in os.listdir(sourceDir):
             if fileName.endswith(".pro"):
                 sourceName = fileName.replace(".pro", ".net")
+            elif fileName.endswith(".kicad_pro"):
+                sourceName = fileName.replace(".kicad_pro", ".kicad_sch")
         if sourceName:
             sourcePath = os.path.join(sourceDir, sourceName)
             if os.path.exists(sourcePath):
@@ -187,7 +190,10 @@ def getSourceFileName():
                 return sourcePath
     sourcePath = showFilePicker(
         os.path.join(sourceDir, sourceName),
-        **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+        **{
+            "Схема или список цепей KiCad": "*.kicad_sch;*.net;*.xml",
+            "Все файлы": "*.*"
+        }
     )
     if sourcePath is not None:
         config.set("doc", "source", sourcePath)
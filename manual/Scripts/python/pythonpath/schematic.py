@@ -3,10 +3,13 @@
 import sys
 
 kicadnet = None
+kicadsch = None
 
 def init(scriptcontext):
     global kicadnet
+    global kicadsch
     kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+    kicadsch = sys.modules["kicadsch" + scriptcontext.getDocument().RuntimeUID]
 
 
 class Schematic():
@@ -21,27 +24,24 @@ class Schematic():
         self.inspector = ""
         self.approver = ""
 
-        netlist = kicadnet.Netlist(netlistName)
-        for sheet in netlist.items("sheet"):
-            if sheet.attributes["name"] == "/":
-                title_block = netlist.find("title_block", sheet)
-                for item in title_block.items:
-                    if item.name == "title":
-                        self.title = item.text if item.text is not None else ""
-                    elif item.name == "company":
-                        self.company = item.text if item.text is not None else ""
-                    elif item.name == "comment":
-                        if item.attributes["number"] == "1":
-                            self.number = item.attributes["value"]
-                        elif item.attributes["number"] == "2":
-                            self.developer = item.attributes["value"]
-                        elif item.attributes["number"] == "3":
-                            self.verifier = item.attributes["value"]
-                        elif item.attributes["number"] == "4":
-                            self.approver = item.attributes["value"]
-                        elif item.attributes["number"] == "6":
-                            self.inspector = item.attributes["value"]
-                break
-                if self.getRefNumber() > comp.getRefNumber():
-                    # Указывать на обозначение с наименьшим номером
-                    self.reference = comp.reference
+        if netlistName.endswith(".kicad_sch"):
+            titleBlock = kicadsch.readTitleBlock(netlistName)
+        else:
+            titleBlock = kicadnet.readTitleBlock(netlistName)
+        if titleBlock is not None:
+            for item in titleBlock.items:
+                if item.name == "title":
+                    self.title = item.text if item.text is not None else ""
+                elif item.name == "company":
+                    self.company = item.text if item.text is not None else ""
+                elif item.name == "comment":
+                    if item.attributes["number"] == "1":
+                        self.number = item.attributes["value"]
+                    elif item.attributes["number"] == "2":
+                        self.developer = item.attributes["value"]
+                    elif item.attributes["number"] == "3":
+                        self.verifier = item.attributes["value"]
+                    elif item.attributes["number"] == "4":
+                        self.approver = item.attributes["value"]
+                    elif item.attributes["number"] == "6":
+                        self.inspector = item.attributes["value"]
@@ -155,30 +155,22 @@ class BomBuildingThread(threading.Thread):
         # ----------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
-
-        def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
-
-        def isRowEmpty(row):
-            lastCol = len(table.Rows[row].TableColumnSeparators)
-            rowCells = table.getCellRangeByPosition(
-                0, # left
-                row, # top
-                lastCol, # right
-                row # bottom
-            )
-            dataIsPresent = any(rowCells.DataArray[0])
-            return not dataIsPresent
+            for _ in range(count):
+                writer.append(common.TableRow())
+
+        def getFontSize(col, isTitle=False):
+            # Размер шрифта определяется стилем абзаца графы
+            # (для заголовка -- стилем заголовка).
+            if col == 1 and isTitle:
+                return fontSizes["Наименование (заголовок)"]
+            return fontSizes[common.TABLE_COLUMN_STYLES[col]]
 
         def fillRow(values, isTitle=False, posIncrement=0):
             colWidth = (6, 54, 49, 29, 9, 9, 22)
             extraRow = [""] * len(values)
-            extremeWidthFactor = config.getint("doc", "extreme width factor")
-            doc.lockControllers()
+            extremeWidthFactor = settings.doc.extremeWidthFactor
+            row = common.TableRow(values, isTitle)
+            values = row.values
             for col in range(len(values)):
                 if values[col] == "" and not (col == 0 and posIncrement != 0):
                     continue
@@ -189,7 +181,7 @@ class BomBuildingThread(threading.Thread):
                     extraRow[col] = text[(lfPos + 1):]
                 widthFactor = textwidth.getWidthFactor(
                     values[col],
-                    getFontSize(col),
+                    getFontSize(col, isTitle),
                     colWidth[col]
                 )
                 if widthFactor < extremeWidthFactor:
@@ -208,43 +200,24 @@ class BomBuildingThread(threading.Thread):
                         extraRow[col] = text[(pos + 1):] + '\n' + extraRow[col]
                         widthFactor = textwidth.getWidthFactor(
                             values[col],
-                            getFontSize(col),
+                            getFontSize(col, isTitle),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 1 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
+                    row.paraStyles[col] = "Наименование (заголовок)"
+                row.widthFactors[col] = widthFactor
                 if col == 0 and posIncrement \
-                    and config.getboolean("doc", "only components have position numbers"):
-                        if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
-                            posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
-                        else:
-                            posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
-                            posFieldMaster.SubType = 0
-                            posFieldMaster.Name = "Позиция"
-                        posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
-                        posField.Content = "Позиция+" + str(posIncrement)
-                        posField.attachTextFieldMaster(posFieldMaster)
-                        cell.Text.insertTextContent(cellCursor, posField, False)
-
+                    and settings.doc.onlyComponentsHavePositionNumbers:
+                        row.posCol = col
+                        row.posIncrement = posIncrement
                         self.currentPosition += posIncrement
-                        widthFactor = textwidth.getWidthFactor(
+                        row.posWidthFactor = textwidth.getWidthFactor(
                             str(self.currentPosition),
                             getFontSize(col),
                             colWidth[col]
                         )
-                        cellCursor.gotoStart(False)
-                        cellCursor.gotoEnd(True)
-                        cellCursor.CharScaleWidth = widthFactor
-                elif values[col]:
-                    cell.String = values[col]
-            doc.unlockControllers()
-
-            gotoNextRow()
+            writer.append(row)
+
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
@@ -252,19 +225,35 @@ class BomBuildingThread(threading.Thread):
         # Начало построения таблицы
         # ----------------------------------------------------------------
         try:
-            schematic = common.getSchematicData()
+            # Параметры считываются один раз на всё построение
+            settings = config.getSnapshot()
+            schematic = common.getSchematicData(settings=settings)
             if schematic is None:
                 return
             doc = XSCRIPTCONTEXT.getDocument()
             doc.UndoManager.lock()
             clean(force=True)
             table = doc.TextTables["Ведомость_покупных_изделий"]
+            # Последняя строка таблицы -- пустая строка с ненарушенным
+            # форматированием. На её основе будут созданы новые строки.
+            # По окончанию, эта строка будет удалена.
             self.currentRow = table.Rows.Count - 1
+            # Строки ведомости сначала формируются в памяти,
+            # а затем записываются в таблицу за один раз.
+            writer = common.TableWriter(table, self.currentRow)
+            # Новые строки создаются на основе строки-образца
+            # и имеют её высоту.
+            rowHeight = table.Rows[self.currentRow].Height
+            # Размеры шрифта граф считываются из стилей абзаца
+            # один раз за всё построение.
+            fontSizes = common.getFontSizes(
+                common.TABLE_COLUMN_STYLES + ("Наименование (заголовок)",)
+            )
             compGroups = schematic.getGroupedComponents()
             prevGroup = None
-            emptyRowsType = config.getint("doc", "empty rows between diff type")
+            emptyRowsType = settings.doc.emptyRowsBetweenDiffType
 
-            progressTotal = 6
+            progressTotal = 4
             for group in compGroups:
                 progressTotal += len(group)
             progressDialog = ProgressDialog(
@@ -272,22 +261,14 @@ class BomBuildingThread(threading.Thread):
                 progressTotal
             )
 
-            # В процессе заполнения ведомости, после текущей строки всегда
-            # должна оставаться пустая строка с ненарушенным форматированием.
-            # На её основе будут создаваться новые строки.
-            # По окончанию, эта строка будет удалена.
-            table.Rows.insertByIndex(self.currentRow, 1)
-
             for group in compGroups:
                 increment = 1
                 if prevGroup is not None:
-                    doc.lockControllers()
                     gotoNextRow(emptyRowsType)
-                    doc.unlockControllers()
-                    if config.getboolean("doc", "reserve position numbers"):
+                    if settings.doc.reservePositionNumbers:
                         increment += emptyRowsType
                 if len(group) == 1 \
-                    and not config.getboolean("doc", "every group has title"):
+                    and not settings.doc.everyGroupHasTitle:
                         compType = group[0].getBomValue("type", singular=True)
                         compName = group[0].getBomValue("name")
                         compDoc = group[0].getBomValue("doc")
@@ -309,9 +290,9 @@ class BomBuildingThread(threading.Thread):
                             ["", title],
                             isTitle=True
                         )
-                    if config.getboolean("doc", "empty row after group title"):
+                    if settings.doc.emptyRowAfterGroupTitle:
                         gotoNextRow()
-                        if config.getboolean("doc", "reserve position numbers"):
+                        if settings.doc.reservePositionNumbers:
                             increment += 1
                     for compRange in group:
                         compName = compRange.getBomValue("name")
@@ -328,51 +309,19 @@ class BomBuildingThread(threading.Thread):
                         progressDialog.stepUp()
                 prevGroup = group
 
-            table.Rows.removeByIndex(self.currentRow, 2)
-
-            progressDialog.stepUp()
-
-            if config.getboolean("doc", "prohibit titles at bottom"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount
-                while pos < table.Rows.Count:
-                    offset = 0
-                    # Если внизу страницы пустая строка -
-                    # подняться вверх к строке с данными.
-                    while isRowEmpty(pos - offset) and pos > (offset + 1):
-                        offset += 1
-                    cell = table.getCellByPosition(1, pos - offset)
-                    cellCursor = cell.createTextCursor()
-                    if cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                        and cell.String != "":
-                            offset += 1
-                            while pos > offset:
-                                cell = table.getCellByPosition(1, pos - offset)
-                                cellCursor = cell.createTextCursor()
-                                if not cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                                    or cell.String == "":
-                                        doc.lockControllers()
-                                        table.Rows.insertByIndex(pos - offset, offset)
-                                        doc.unlockControllers()
-                                        break
-                                offset += 1
-                    pos += otherRowCount
-
-            progressDialog.stepUp()
-
-            if config.getboolean("doc", "prohibit empty rows at top"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount + 1
-                while pos < table.Rows.Count:
-                    doc.lockControllers()
-                    while pos < table.Rows.Count and isRowEmpty(pos):
-                        table.Rows.removeByIndex(pos, 1)
-                    pos += otherRowCount
-                    doc.unlockControllers()
+            # Строки размещаются по листам до записи в таблицу
+            common.paginateRows(
+                writer.rows,
+                self.currentRow,
+                settings.doc.prohibitTitlesAtBottom,
+                settings.doc.prohibitEmptyRowsAtTop
+            )
+            writer.flush()
+            table.Rows.removeByIndex(writer.rowIndex, 1)
 
             progressDialog.stepUp()
 
-            if not config.getboolean("doc", "only components have position numbers"):
+            if not settings.doc.onlyComponentsHavePositionNumbers:
                 doc.lockControllers()
                 if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
                     posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
@@ -400,34 +349,59 @@ class BomBuildingThread(threading.Thread):
 
             progressDialog.stepUp()
 
-            common.updateTableRowsHeight()
+            common.updateTableRowsHeight(rowHeight=rowHeight)
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "process repeated values"):
+            if settings.doc.processRepeatedValues:
                 doc.lockControllers()
-                colCount = 11
-                prevValues = [""] * colCount
-                repeatCount  = [0] * colCount
-                for rowIndex in range(1, table.Rows.Count):
-                    for colIndex in (2, 3, 6):
-                        cell = table.getCellByPosition(colIndex, rowIndex)
-                        if cell.String and cell.String == prevValues[colIndex]:
-                            repeatCount[colIndex] += 1
-                            if repeatCount[colIndex] == 1:
-                                cell.String = "То же"
-                            elif repeatCount[colIndex] > 1:
-                                cell.String = '»'
+                firstRow = 1
+                lastRow = table.Rows.Count - 1
+                for colIndex in (2, 3, 6):
+                    if lastRow < firstRow:
+                        break
+                    # Значения графы считываются одним блоком, а изменённые
+                    # записываются одним непрерывным блоком.
+                    colCells = table.getCellRangeByPosition(
+                        colIndex, # left
+                        firstRow, # top
+                        colIndex, # right
+                        lastRow # bottom
+                    )
+                    colValues = [rowValues[0] for rowValues in colCells.DataArray]
+                    prevValue = ""
+                    repeatCount = 0
+                    changedRows = []
+                    for rowIndex, value in enumerate(colValues):
+                        if value and value == prevValue:
+                            repeatCount += 1
+                            if repeatCount == 1:
+                                colValues[rowIndex] = "То же"
+                            else:
+                                colValues[rowIndex] = '»'
+                            changedRows.append(rowIndex)
                         else:
-                            prevValues[colIndex] = cell.String
-                            repeatCount[colIndex] = 0
+                            prevValue = value
+                            repeatCount = 0
+                    if changedRows:
+                        top = changedRows[0]
+                        bottom = changedRows[-1]
+                        changedCells = table.getCellRangeByPosition(
+                            colIndex, # left
+                            firstRow + top, # top
+                            colIndex, # right
+                            firstRow + bottom # bottom
+                        )
+                        changedCells.DataArray = tuple(
+                            (value,) for value in colValues[top:bottom + 1]
+                        )
                 doc.unlockControllers()
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "append rev table"):
+            if settings.doc.appendRevTable:
                 pageCount = doc.CurrentController.PageCount
-                if pageCount > config.getint("doc", "pages rev table"):
+                if pageCount > settings.doc.pagesRevTable:
                     common.appendRevTable()
 
         except StopException:
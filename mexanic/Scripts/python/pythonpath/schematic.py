@@ -1,44 +1,418 @@
 """Объектное представление схемы."""
 
+import functools
 import re
 import sys
 
 kicadnet = None
+kicadsch = None
 config = None
 
 def init(scriptcontext):
     global kicadnet
+    global kicadsch
     global config
     kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+    kicadsch = sys.modules["kicadsch" + scriptcontext.getDocument().RuntimeUID]
     config = sys.modules["config" + scriptcontext.getDocument().RuntimeUID]
 
 REF_REGEXP = re.compile(r"([^0-9?]+)([0-9]+)")
 
 
+def splitReference(reference):
+    """Разделить обозначение на буквенную и цифровую части.
+
+    Аргументы:
+    reference (str) -- обозначение компонента, например "R12".
+
+    Возвращаемое значение (tuple) -- (буквенная часть (str), номер (int))
+        или (None, None), если обозначение не соответствует формату.
+
+    """
+    match = REF_REGEXP.match(reference)
+    if match is None:
+        return (None, None)
+    return (match.group(1), int(match.group(2)))
+
+# Количество разобранных шаблонов, которые хранятся в памяти
+PATTERN_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compilePattern(pattern):
+    """Разобрать шаблон (см. Component.formatPattern()).
+
+    Результат кэшируется, поэтому каждый шаблон разбирается один раз.
+
+    Аргументы:
+    pattern (str) -- строка текста, которую следует обработать как шаблон.
+
+    Возвращаемое значение -- кортеж операций, где каждая операция --
+        либо строка (текст, выводимый без изменений), либо кортеж
+        (префикс, наименование поля, суффикс) для подстановки значения
+        поля. Если в кортеже нет ни одной подстановки, то строка не
+        является шаблоном.
+
+    """
+    ops = []
+    out = ""
+    prefix = ""
+    fieldName = ""
+    suffix = ""
+    temp = ""
+
+    # Флаг, указывающий на то, что спец.символ нужно обработать как обычный
+    ignore = False
+    # Флаг, указывающий на обрабатываемую часть подстановки.
+    substitution = ""
+
+    def resetSubstitution():
+        nonlocal out, temp, substitution, prefix, fieldName, suffix
+        out += temp
+        substitution = temp = ""
+        prefix = fieldName = suffix = ""
+
+    for char in pattern:
+        if char == '\\' and substitution and not ignore:
+                ignore = True
+                temp += char
+                continue
+        elif substitution:
+            temp += char
+            if substitution == "beginning":
+                if char == '{' and not ignore:
+                    substitution = "prefix"
+                else:
+                    out += temp
+                    substitution = temp = ""
+            elif char == '{' and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${...{
+                #      ^
+                # открывающаяся фигурная скобка внутри подстановки.
+                resetSubstitution()
+            elif char == '|' and substitution == "prefix" and not ignore:
+                substitution = "fieldName"
+            elif char == '|' and substitution == "fieldName" and not ignore:
+                substitution = "suffix"
+            elif char == '|' and substitution == "suffix" and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${prefix|fieldName|suffix|
+                #                          ^
+                # третья вертикальная черта внутри подстановки.
+                resetSubstitution()
+            elif char == "}" and not ignore:
+                if substitution == "fieldName":
+                    # Конструкция ${} имеет неверный формат:
+                    # ${prefix|fieldName}
+                    #                   ^
+                    # одна вертикальная черта в подстановке. Должно быть
+                    # либо две (для пефикса/суффикса), либо не быть вовсе.
+                    resetSubstitution()
+                else:
+                    if substitution == "prefix":
+                        # Если по завершении конструкции ${} имеется только
+                        # префикс, значит найдена сокращённая конструкция
+                        # (без префикса/суффикса).
+                        fieldName = prefix
+                        prefix = ""
+                    if out:
+                        ops.append(out)
+                        out = ""
+                    ops.append((prefix, fieldName, suffix))
+                substitution = temp = prefix = fieldName = suffix = ""
+            elif substitution == "prefix":
+                prefix += char
+            elif substitution == "fieldName":
+                fieldName += char
+            elif substitution == "suffix":
+                suffix += char
+        elif char == '$':
+            substitution = "beginning"
+            temp += char
+        else:
+            out += char
+        ignore = False
+    if substitution:
+        # Конструкция ${} неожиданно закончилась.
+        resetSubstitution()
+    if out:
+        ops.append(out)
+    return tuple(ops)
+
+
+# Множители значений: обозначение -> (обозначение на русском, величина)
+VALUE_MULTIPLIERS = {
+    'G': ('Г', 1e9),
+    'Г': ('Г', 1e9),
+    'M': ('М', 1e6),
+    'М': ('М', 1e6),
+    'k': ('к', 1e3),
+    'к': ('к', 1e3),
+    'm': ('м', 1e-3),
+    'м': ('м', 1e-3),
+    'μ': ('мк', 1e-6),
+    'u': ('мк', 1e-6),
+    'U': ('мк', 1e-6),
+    'мк': ('мк', 1e-6),
+    'n': ('н', 1e-9),
+    'н': ('н', 1e-9),
+    'p': ('п', 1e-12),
+    'п': ('п', 1e-12),
+}
+_MULTIPLIERS_PATTERN = '|'.join(
+    sorted(VALUE_MULTIPLIERS, key=len, reverse=True)
+)
+# 2u7, 2н7, 4m7, 5k1 ...
+VALUE_REGEXP1 = re.compile(
+    r"^(\d+)({})(\d+)$".format(_MULTIPLIERS_PATTERN)
+)
+# 2.7 u, 2700p, 4.7 m, 470u, 5.1 k, 510 ...
+VALUE_REGEXP2 = re.compile(
+    r"^(\d+(?:[\.,]\d+)?)\s*({})?$".format(_MULTIPLIERS_PATTERN)
+)
+INT_REGEXP = re.compile(r"^\d+$")
+FLOAT_REGEXP = re.compile(r"^\d+[\.,]\d+$")
+NUMBER_REGEXP = re.compile(r"^\d+(?:[\.,]\d+)?$")
+# R47; 4R7
+RESISTANCE_REGEXP1 = re.compile(r"R\d+")
+RESISTANCE_REGEXP2 = re.compile(r"\d+R\d+")
+
+# значение 1 {значение 2}
+SINGULAR_PLURAL_REGEXP = re.compile(r"^(.+)\s\{(.+)\}$")
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def splitSingularPlural(value):
+    """Разделить значение поля на единственное и множественное число.
+
+    Аргументы:
+    value (str) -- значение поля в формате "значение 1 {значение 2}".
+
+    Возвращаемое значение -- кортеж (единственное число,
+        множественное число) или None, если значение не соответствует
+        указанному формату.
+
+    """
+    match = SINGULAR_PLURAL_REGEXP.match(value)
+    if match is None:
+        return None
+    return match.groups()
+
+# Количество разобранных значений, которые хранятся в памяти
+VALUE_CACHE_SIZE = 16384
+
+
+@functools.lru_cache(maxsize=VALUE_CACHE_SIZE)
+def parseValue(refType, value):
+    """Разобрать значение компонента.
+
+    Значения конденсаторов, катушек индуктивности и резисторов
+    (определяются по первой букве обозначения: 'C', 'L', 'R') приводятся
+    к стандартному виду и к абсолютной величине, например:
+    2u7 -> 2,7 мкФ и 2.7e-6
+    Результат кэшируется, т.к. одинаковые значения встречаются в схеме
+    многократно.
+
+    Аргументы:
+    refType (str) -- буквенная часть обозначения;
+    value (str) -- значение компонента.
+
+    Возвращаемое значение -- кортеж (parts, absValue), где
+        parts -- кортеж (число, множитель, единицы измерения) для
+        значения в стандартном виде или None, если значение не
+        требуется преобразовывать;
+        absValue (float) -- абсолютное значение с учётом множителя или
+        float("inf"), если значение не является числом.
+
+    """
+    numValue = ""
+    multiplier = ""
+    units = ""
+    absValue = float("inf")
+    absMultiplier = 1
+    if refType.startswith('C'):
+        if not value.endswith('Ф'):
+            units = 'Ф'
+            if INT_REGEXP.match(value):
+                numValue = value
+                multiplier = 'п'
+            elif FLOAT_REGEXP.match(value):
+                numValue = value
+                multiplier = "мк"
+            else:
+                numValue = value.rstrip('F').strip()
+                match = VALUE_REGEXP1.match(numValue)
+                if match is not None:
+                    numValue = "{},{}".format(match.group(1), match.group(3))
+                    multiplier = match.group(2)
+                else:
+                    match = VALUE_REGEXP2.match(numValue)
+                    if match is not None:
+                        numValue = match.group(1)
+                        multiplier = match.group(2)
+                    else:
+                        numValue = ""
+        absText = value.rstrip('F').rstrip('Ф').strip()
+        if INT_REGEXP.match(absText):
+            absMultiplier = 1e-12
+        elif FLOAT_REGEXP.match(absText):
+            absMultiplier = 1e-6
+        else:
+            match = VALUE_REGEXP1.match(absText)
+            if match is not None:
+                absText = "{}.{}".format(match.group(1), match.group(3))
+                absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+            else:
+                match = VALUE_REGEXP2.match(absText)
+                if match is not None:
+                    absText = match.group(1)
+                    if match.group(2) is not None:
+                        absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+                else:
+                    absText = ""
+    elif refType.startswith('L'):
+        if not value.endswith("Гн"):
+            units = "Гн"
+            numValue = value.rstrip('H').strip()
+            match = VALUE_REGEXP1.match(numValue)
+            if match is not None:
+                numValue = "{},{}".format(match.group(1), match.group(3))
+                multiplier = match.group(2)
+            else:
+                match = VALUE_REGEXP2.match(numValue)
+                if match is not None:
+                    numValue = match.group(1)
+                    if match.group(2) is None:
+                        multiplier = "мк"
+                    else:
+                        multiplier = match.group(2)
+                else:
+                    numValue = ""
+        absText = value.rstrip('H').replace("Гн", "").strip()
+        if NUMBER_REGEXP.match(absText):
+            absMultiplier = 1e-6
+        else:
+            match = VALUE_REGEXP1.match(absText)
+            if match is not None:
+                absText = "{}.{}".format(match.group(1), match.group(3))
+                absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+            else:
+                match = VALUE_REGEXP2.match(absText)
+                if match is not None:
+                    absText = match.group(1)
+                    if match.group(2) is not None:
+                        absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+                else:
+                    absText = ""
+    elif refType.startswith('R'):
+        if not value.endswith("Ом"):
+            units = "Ом"
+            numValue = value.rstrip('Ω')
+            if numValue.endswith("Ohm") or numValue.endswith("ohm"):
+                numValue = numValue[:-3]
+            numValue = numValue.strip()
+            if RESISTANCE_REGEXP1.match(numValue):
+                numValue = numValue.replace('R', "0,")
+            elif RESISTANCE_REGEXP2.match(numValue):
+                numValue = numValue.replace('R', ',')
+            else:
+                match = VALUE_REGEXP1.match(numValue)
+                if match is not None:
+                    numValue = "{},{}".format(match.group(1), match.group(3))
+                    multiplier = match.group(2)
+                else:
+                    match = VALUE_REGEXP2.match(numValue)
+                    if match is not None:
+                        numValue = match.group(1)
+                        if match.group(2) is not None:
+                            multiplier = match.group(2)
+                    else:
+                        numValue = ""
+        absText = value.rstrip('Ω').replace("Ом", "")
+        absText = absText.replace("ohm", "").replace("Ohm", "").strip()
+        if RESISTANCE_REGEXP1.match(absText):
+            absText = absText.replace('R', "0.")
+        elif RESISTANCE_REGEXP2.match(absText):
+            absText = absText.replace('R', ".")
+        else:
+            match = VALUE_REGEXP1.match(absText)
+            if match is not None:
+                absText = "{}.{}".format(match.group(1), match.group(3))
+                absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+            else:
+                match = VALUE_REGEXP2.match(absText)
+                if match is not None:
+                    absText = match.group(1)
+                    if match.group(2) is not None:
+                        absMultiplier = VALUE_MULTIPLIERS[match.group(2)][1]
+                else:
+                    absText = ""
+    else:
+        absText = value
+    if absText:
+        try:
+            absValue = float(absText.replace(',', '.')) * absMultiplier
+        except ValueError:
+            pass
+
+    parts = None
+    if numValue:
+        # Перевести множитель на русский
+        if multiplier in VALUE_MULTIPLIERS:
+            multiplier = VALUE_MULTIPLIERS[multiplier][0]
+        elif multiplier is None:
+            multiplier = ""
+        parts = (numValue.replace('.', ','), multiplier, units)
+    return parts, absValue
+
+
+def parseValues(refTypes, values):
+    """Вычислить абсолютные значения множества компонентов.
+
+    Пакетный вариант parseValue(): значения всех компонентов схемы
+    обрабатываются за один проход, а одинаковые пары (буквенная часть
+    обозначения, значение) разбираются только один раз.
+
+    Аргументы:
+    refTypes (list) -- буквенные части обозначений компонентов;
+    values (list) -- значения компонентов.
+
+    Возвращаемое значение (list) -- абсолютные значения (float) в том же
+        порядке; float("inf") для значений, не являющихся числами.
+
+    """
+    absValues = {}
+    for item in zip(refTypes, values):
+        if item not in absValues:
+            absValues[item] = parseValue(*item)[1]
+    return [absValues[item] for item in zip(refTypes, values)]
+
+
+class ReversedKey():
+    """Ключ сортировки в обратном порядке.
+
+    Позволяет объединить в одном составном ключе уровни сортировки по
+    возрастанию и по убыванию. Равные ключи остаются равными, поэтому
+    сортировка сохраняет устойчивость, как и при reverse=True.
+
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
 class Component():
     """Данные о компоненте схемы."""
 
-    multipliersDict = {
-        'G': 'Г',
-        'M': 'М',
-        'k': 'к',
-        'm': 'м',
-        'μ': 'мк',
-        'u': 'мк',
-        'U': 'мк',
-        'n': 'н',
-        'p': 'п'
-    }
-    multipliers = set(list(multipliersDict.keys()) + list(multipliersDict.values()))
-    # 2u7, 2н7, 4m7, 5k1 ...
-    regexpr1 = re.compile(
-        r"^(\d+)({})(\d+)$".format('|'.join(multipliers))
-    )
-    # 2.7 u, 2700p, 4.7 m, 470u, 5.1 k, 510 ...
-    regexpr2 = re.compile(
-        r"^(\d+(?:[\.,]\d+)?)\s*({})?$".format('|'.join(multipliers))
-    )
-
     def __init__(self, schematic):
         self.schematic = schematic
         self.reference = ""
@@ -47,6 +421,9 @@ class Component():
         self.datasheet = ""
         self.description = ""
         self.fields = {}
+        # Вычисленные значения для документа (параметры схемы неизменны):
+        # (название, единств. число, множеств. число) -> значение
+        self._values = {}
 
     def getFieldValue(self, name):
         """Вернуть значение поля с указанным именем."""
@@ -54,14 +431,14 @@ class Component():
         if name == "Обозначение":
             value = self.reference
         elif name == "Значение":
-            if config.getboolean("doc", "add units"):
+            if self.schematic.settings.doc.addUnits:
                 value = self.getValueWithUnits()
             else:
                 value = self.value
         elif name == "Значение!":
             value = self.getExpandedValue()
         elif name == "Посад.место":
-            if config.getboolean("doc", "footprint only"):
+            if self.schematic.settings.doc.footprintOnly:
                 value = self.getFieldValue("Посад.место!")
             else:
                 value = self.footprint
@@ -80,23 +457,28 @@ class Component():
             value = self.formatPattern(value)
         return value
 
+    @property
+    def reference(self):
+        """Обозначение компонента."""
+        return self._reference
+
+    @reference.setter
+    def reference(self, reference):
+        # Обозначение разбирается один раз при присвоении
+        self._reference = reference
+        self._refType, self._refNumber = splitReference(reference)
+
     def getRefType(self, ref=None):
         """Вернуть буквенную часть обозначения."""
         if ref is None:
-            ref = self.reference
-        if not re.match(REF_REGEXP, ref):
-            return None
-        refType = re.search(REF_REGEXP, ref).group(1)
-        return refType
+            return self._refType
+        return splitReference(ref)[0]
 
     def getRefNumber(self, ref=None):
         """Вернуть цифровую часть обозначения."""
         if ref is None:
-            ref = self.reference
-        if not re.match(REF_REGEXP, ref):
-            return None
-        refNumber = re.search(REF_REGEXP, ref).group(2)
-        return int(refNumber)
+            return self._refNumber
+        return splitReference(ref)[1]
 
     def _convertSingularPlural(self, value, singular, plural):
         """Привести переданное значение к единственному либо множественному числу.
@@ -123,19 +505,16 @@ class Component():
         """
 
         if value and (singular or plural):
-            valueSingularAndPlural = re.match(r"^(.+)\s\{(.+)\}$", value)
-            if valueSingularAndPlural:
+            valueSingularAndPlural = splitSingularPlural(value)
+            if valueSingularAndPlural is not None:
                 if singular:
-                    value = valueSingularAndPlural.group(1)
+                    value = valueSingularAndPlural[0]
                 elif plural:
-                    value = valueSingularAndPlural.group(2)
-            elif self.schematic.typeNamesDict:
-                for item in iter(self.schematic.typeNamesDict.items()):
-                    if value in item:
-                        if singular:
-                            value = item[0]
-                        elif plural:
-                            value = item[1]
+                    value = valueSingularAndPlural[1]
+            elif singular:
+                value = self.schematic.singularTypeNames.get(value, value)
+            elif plural:
+                value = self.schematic.pluralTypeNames.get(value, value)
         return value
 
     def getValueWithUnits(self):
@@ -146,83 +525,14 @@ class Component():
             2u7 -> 2,7 мкФ
 
         """
-        numValue = ""
+        parts, _ = parseValue(self.getRefType() or "", self.value)
+        if parts is None:
+            return self.value
+        numValue, multiplier, units = parts
         separator = ""
-        if config.getboolean("doc", "space before units"):
+        if self.schematic.settings.doc.spaceBeforeUnits:
             separator = ' '
-        multiplier = ""
-        units = ""
-        if self.getRefType().startswith('C') \
-            and not self.value.endswith('Ф'):
-                units = 'Ф'
-                if re.match(r"^\d+$", self.value):
-                    numValue = self.value
-                    multiplier = 'п'
-                elif re.match(r"^\d+[\.,]\d+$", self.value):
-                    numValue = self.value
-                    multiplier = "мк"
-                else:
-                    numValue = self.value.rstrip('F')
-                    numValue = numValue.strip()
-                    if re.match(Component.regexpr1, numValue):
-                        searchRes = re.search(Component.regexpr1, numValue).groups()
-                        numValue = "{},{}".format(searchRes[0], searchRes[2])
-                        multiplier = searchRes[1]
-                    elif re.match(Component.regexpr2, numValue):
-                        searchRes = re.search(Component.regexpr2, numValue).groups()
-                        numValue = searchRes[0]
-                        multiplier = searchRes[1]
-                    else:
-                        numValue = ""
-        elif self.getRefType().startswith('L') \
-            and not self.value.endswith("Гн"):
-                units = "Гн"
-                numValue = self.value.rstrip('H')
-                numValue = numValue.strip()
-                if re.match(Component.regexpr1, numValue):
-                    searchRes = re.search(Component.regexpr1, numValue).groups()
-                    numValue = "{},{}".format(searchRes[0], searchRes[2])
-                    multiplier = searchRes[1]
-                elif re.match(Component.regexpr2, numValue):
-                    searchRes = re.search(Component.regexpr2, numValue).groups()
-                    numValue = searchRes[0]
-                    if searchRes[1] is None:
-                        multiplier = "мк"
-                    else:
-                        multiplier = searchRes[1]
-                else:
-                    numValue = ""
-        elif self.getRefType().startswith('R') \
-            and not self.value.endswith("Ом"):
-                units = "Ом"
-                numValue = self.value.rstrip('Ω')
-                if numValue.endswith("Ohm") or numValue.endswith("ohm"):
-                    numValue = numValue[:-3]
-                numValue = numValue.strip()
-                if re.match(r"R\d+", numValue):
-                    numValue = numValue.replace('R', "0,")
-                elif re.match(r"\d+R\d+", numValue):
-                    numValue = numValue.replace('R', ',')
-                elif re.match(Component.regexpr1, numValue):
-                    searchRes = re.search(Component.regexpr1, numValue).groups()
-                    numValue = "{},{}".format(searchRes[0], searchRes[2])
-                    multiplier = searchRes[1]
-                elif re.match(Component.regexpr2, numValue):
-                    searchRes = re.search(Component.regexpr2, numValue).groups()
-                    numValue = searchRes[0]
-                    if searchRes[1] is not None:
-                        multiplier = searchRes[1]
-                else:
-                    numValue = ""
-        if numValue:
-            # Перевести множитель на русский
-            if multiplier in Component.multipliersDict:
-                multiplier = Component.multipliersDict[multiplier]
-            elif multiplier is None:
-                multiplier = ''
-            numValue = numValue.replace('.', ',')
-            return numValue + separator + multiplier + units
-        return self.value
+        return numValue + separator + multiplier + units
 
     def formatPattern(self, pattern, check=False, singular=False, plural=False):
         """Преобразовать шаблон.
@@ -267,91 +577,19 @@ class Component():
 
         """
         pattern = str(pattern)
-        out = ""
-        prefix = ""
-        fieldName = ""
-        suffix = ""
-        temp = ""
-
-        # Флаг, указывающий на то, что спец.символ нужно обработать как обычный
-        ignore = False
-        # Флаг, указывающий на обрабатываемую часть подстановки.
-        substitution = ""
-
-        def resetSubstitution():
-            nonlocal out, temp, substitution, prefix, fieldName, suffix
-            out += temp
-            substitution = temp = ""
-            prefix = fieldName = suffix = ""
-
-        for char in pattern:
-            if char == '\\' and substitution and not ignore:
-                    ignore = True
-                    temp += char
-                    continue
-            elif substitution:
-                temp += char
-                if substitution == "beginning":
-                    if char == '{' and not ignore:
-                        substitution = "prefix"
-                    else:
-                        out += temp
-                        substitution = temp = ""
-                elif char == '{' and not ignore:
-                    # Конструкция ${} имеет неверный формат:
-                    # ${...{
-                    #      ^
-                    # открывающаяся фигурная скобка внутри подстановки.
-                    resetSubstitution()
-                elif char == '|' and substitution == "prefix" and not ignore:
-                    substitution = "fieldName"
-                elif char == '|' and substitution == "fieldName" and not ignore:
-                    substitution = "suffix"
-                elif char == '|' and substitution == "suffix" and not ignore:
-                    # Конструкция ${} имеет неверный формат:
-                    # ${prefix|fieldName|suffix|
-                    #                          ^
-                    # третья вертикальная черта внутри подстановки.
-                    resetSubstitution()
-                elif char == "}" and not ignore:
-                    if substitution == "fieldName":
-                        # Конструкция ${} имеет неверный формат:
-                        # ${prefix|fieldName}
-                        #                   ^
-                        # одна вертикальная черта в подстановке. Должно быть
-                        # либо две (для пефикса/суффикса), либо не быть вовсе.
-                        resetSubstitution()
-                    else:
-                        if substitution == "prefix":
-                            # Если по завершении конструкции ${} имеется только
-                            # префикс, значит найдена сокращённая конструкция
-                            # (без префикса/суффикса).
-                            fieldName = prefix
-                            prefix = ""
-                        if check:
-                            return True
-                        fieldValue = self.getFieldValue(fieldName)
-                        if fieldValue:
-                            fieldValue = self._convertSingularPlural(fieldValue, singular, plural)
-                            out += prefix + fieldValue + suffix
-                    substitution = temp = prefix = fieldName = suffix = ""
-                elif substitution == "prefix":
-                    prefix += char
-                elif substitution == "fieldName":
-                    fieldName += char
-                elif substitution == "suffix":
-                    suffix += char
-            elif char == '$':
-                substitution = "beginning"
-                temp += char
-            else:
-                out += char
-            ignore = False
-        if substitution:
-            # Конструкция ${} неожиданно закончилась.
-            resetSubstitution()
+        ops = compilePattern(pattern)
         if check:
-            return False
+            return any(not isinstance(op, str) for op in ops)
+        out = ""
+        for op in ops:
+            if isinstance(op, str):
+                out += op
+                continue
+            prefix, fieldName, suffix = op
+            fieldValue = self.getFieldValue(fieldName)
+            if fieldValue:
+                fieldValue = self._convertSingularPlural(fieldValue, singular, plural)
+                out += prefix + fieldValue + suffix
         return out
 
     def getBomValue(self, name, singular=False, plural=False):
@@ -366,12 +604,18 @@ class Component():
         singular (boolean) -- привести к единственному числу;
         plural (boolean) -- привести к множественному числу.
 
+        Значение вычисляется один раз, т.к. параметры схемы
+        (Schematic.settings) не изменяются.
+
         Возвращаемое значение (str) -- итоговое значение.
 
         """
         if name not in ("type", "name", "code", "doc", "dealer", "for what", "comment"):
             return ""
-        fieldName = config.get("fields", name)
+        key = (name, singular, plural)
+        if key in self._values:
+            return self._values[key]
+        fieldName = self.schematic.settings.fields[name]
         value = ""
         if self.formatPattern(fieldName, check=True):
             value = self.formatPattern(fieldName, singular=singular, plural=plural)
@@ -382,8 +626,9 @@ class Component():
             value = self.getFieldValue("Значение")
         if value is None:
             value = ""
-        elif config.getboolean("doc", "split row by \\n"):
+        elif self.schematic.settings.doc.splitRowByN:
             value = value.replace("\\n", "\n")
+        self._values[key] = value
         return value
 
     def getExpandedValue(self):
@@ -400,120 +645,58 @@ class Component():
         Возвращаемое значение (float) -- абсолютное значение.
 
         """
-        extValue = float("inf")
-        multiplierValues = {
-            'G': 1e9,
-            'Г': 1e9,
-            'M': 1e6,
-            'М': 1e6,
-            'k': 1e3,
-            'к': 1e3,
-            'm': 1e-3,
-            'м': 1e-3,
-            'μ': 1e-6,
-            'u': 1e-6,
-            'U': 1e-6,
-            'мк': 1e-6,
-            'n': 1e-9,
-            'н': 1e-9,
-            'p': 1e-12,
-            'п': 1e-12,
-            None: 1
-        }
-        if self.getRefType().startswith('C'):
-            value = self.value
-            value = value.rstrip('F')
-            value = value.rstrip('Ф')
-            value = value.strip()
-            if re.match(r"^\d+$", value):
-                extValue = float(value) * 1e-12
-            elif re.match(r"^\d+[\.,]\d+$", value):
-                extValue = float(value.replace(',', '.')) * 1e-6
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue.replace(',', '.')) * multiplier
-        elif self.getRefType().startswith('L'):
-            value = self.value
-            value = value.rstrip('H')
-            value = value.replace("Гн", "")
-            value = value.strip()
-            if re.match(r"^\d+(?:[\.,]\d+)?$", value):
-                extValue = float(value.replace(',', '.')) * 1e-6
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue.replace(',', '.')) * multiplier
-        elif self.getRefType().startswith('R'):
-            value = self.value
-            value = value.rstrip('Ω')
-            value = value.replace("Ом", "")
-            value = value.replace("ohm", "")
-            value = value.replace("Ohm", "")
-            value = value.strip()
-            if re.match(r"R\d+", value):
-                numValue = value.replace('R', "0.")
-                extValue = float(numValue)
-            elif re.match(r"\d+R\d+", value):
-                numValue = value.replace('R', ".")
-                extValue = float(numValue)
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                if searchRes[1] is not None:
-                    multiplier = multiplierValues[searchRes[1]]
-                else:
-                    multiplier = 1
-                extValue = float(numValue.replace(',', '.')) * multiplier
-        else:
-            try:
-                extValue = float(self.value.replace(',', '.'))
-            except ValueError:
-                pass
+        _, absValue = parseValue(self.getRefType() or "", self.value)
+        return absValue
+
+    def getIdentity(self):
+        """Вернуть признаки, по которым компоненты объединяются в CompRange.
 
-        return extValue
+        Если тип не указан, то учитывается и буквенная часть обозначения.
+
+        Возвращаемое значение (tuple) -- тип, наименование, документ,
+            примечание, поставщик и буквенная часть обозначения (пустая
+            строка, если тип указан).
+
+        """
+        compType = self.getBomValue("type")
+        return (
+            compType,
+            self.getBomValue("name"),
+            self.getBomValue("doc"),
+            self.getBomValue("comment"),
+            self.getBomValue("dealer"),
+            "" if compType else self.getRefType()
+        )
 
 
 class CompRange(Component):
     """Множество компонентов с одинаковыми параметрами.
 
     Этот класс описывает множество компонентов ведомости, которые
-    имеют одинаковые тип, наименование, документ и примечание
-    (отличаются только обозначением).
+    имеют одинаковые признаки (см. Component.getIdentity()) и отличаются
+    только обозначением.
 
     """
 
     def __init__(self, schematic, comp=None):
         Component.__init__(self, schematic)
+        # Обозначения в разобранном виде: (буквенная часть, номер, обозначение)
         self._refRange = []
         if comp is not None:
-            self._refRange.append(comp.reference)
+            self._refRange.append(
+                (comp.getRefType(), comp.getRefNumber(), comp.reference)
+            )
             self.reference = comp.reference
             self.value = comp.value
             self.footprint = comp.footprint
             self.datasheet = comp.datasheet
             self.description = comp.description
             self.fields = comp.fields
+            # Вычисленные значения совпадают со значениями компонента
+            self._values = dict(comp._values)
 
     def __iter__(self):
-        for ref in self._refRange:
+        for _, _, ref in self._refRange:
             yield ref
 
     def __len__(self):
@@ -532,20 +715,28 @@ class CompRange(Component):
             False - в противном случае.
 
         """
-        if not self._refRange:
-            self.__init__(self.schematic, comp)
+        if not self._refRange or self.getIdentity() == comp.getIdentity():
+            self.add(comp)
             return True
-        if self.getBomValue("type") == comp.getBomValue("type") \
-            and self.getBomValue("name") == comp.getBomValue("name") \
-            and self.getBomValue("doc") == comp.getBomValue("doc") \
-            and self.getBomValue("comment") == comp.getBomValue("comment"):
-                self._refRange.append(comp.reference)
-                if self.getRefNumber() > comp.getRefNumber():
-                    # Указывать на обозначение с наименьшим номером
-                    self.reference = comp.reference
-                return True
         return False
 
+    def add(self, comp):
+        """Добавить компонент без сравнения параметров.
+
+        Аргументы:
+        comp (Component) -- компонент, который необходимо добавить.
+
+        """
+        if not self._refRange:
+            self.__init__(self.schematic, comp)
+            return
+        self._refRange.append(
+            (comp.getRefType(), comp.getRefNumber(), comp.reference)
+        )
+        if self.getRefNumber() > comp.getRefNumber():
+            # Указывать на обозначение с наименьшим номером
+            self.reference = comp.reference
+
     def getRefRangeString(self):
         """Вернуть перечень обозначений множества одинаковых компонентов."""
         refStr = ""
@@ -553,20 +744,13 @@ class CompRange(Component):
             # "VD1, VD2", "C8-C11", "R7, R9-R14" ...
             sortedRanges = sorted(
                 self._refRange,
-                key=lambda ref: self.getRefNumber(ref)
+                key=lambda ref: (ref[0], ref[1])
             )
-            sortedRanges = sorted(
-                sortedRanges,
-                key=lambda ref: self.getRefType(ref)
-            )
-            prevType = self.getRefType(sortedRanges[0])
-            prevNumber = self.getRefNumber(sortedRanges[0])
+            prevType, prevNumber, _ = sortedRanges[0]
             counter = 0
             separator = ", "
             refStr = prevType + str(prevNumber)
-            for nextRef in sortedRanges[1:]:
-                currentType = self.getRefType(nextRef)
-                currentNumber = self.getRefNumber(nextRef)
+            for currentType, currentNumber, _ in sortedRanges[1:]:
                 if currentType == prevType \
                     and currentNumber == (prevNumber + 1):
                         prevNumber = currentNumber
@@ -618,6 +802,16 @@ class CompGroup():
     def sort(self, key=None, reverse=False):
         self._compRanges.sort(key=key, reverse=reverse)
 
+    def add(self, compRange):
+        """Добавить множество компонентов в группу без сравнения параметров.
+
+        Аргументы:
+        compRange (CompRange) -- множество компонентов, которое необходимо
+            добавить в группу.
+
+        """
+        self._compRanges.append(compRange)
+
     def append(self, compRange):
         """Добавить множество компонентов в группу.
 
@@ -634,7 +828,7 @@ class CompGroup():
             return True
         lastCompRange = self._compRanges[-1]
         if lastCompRange.getBomValue("type") == compRange.getBomValue("type"):
-            if config.getboolean("doc", "separate group for each doc"):
+            if self.schematic.settings.doc.separateGroupForEachDoc:
                 if lastCompRange.getBomValue("doc") == compRange.getBomValue("doc"):
                     # Если тип и документ не указаны, формировать группы
                     # на основе буквенной части обозначения.
@@ -656,7 +850,7 @@ class CompGroup():
 class Schematic():
     """Данные о схеме и компонентах."""
 
-    def __init__(self, netlistName):
+    def __init__(self, netlistName, headerOnly=False, settings=None):
         self.title = ""
         self.number = ""
         self.company = ""
@@ -665,41 +859,51 @@ class Schematic():
         self.inspector = ""
         self.approver = ""
         self.components = []
-
-        self.typeNamesDict = {}
-        if config.getboolean("settings", "compatibility mode"):
-            # KB2S - kicadbom2spec
-            settingsKB2S = config.loadFromKicadbom2spec()
-            if settingsKB2S is not None:
-                if settingsKB2S.has_section('group names singular'):
-                    for index in settingsKB2S.options('group names singular'):
-                        if settingsKB2S.has_option('group names plural', index):
-                            singular = settingsKB2S.get('group names singular', index)
-                            plural = settingsKB2S.get('group names plural', index)
-                            self.typeNamesDict[singular] = plural
-
-        netlist = kicadnet.Netlist(netlistName)
-        for sheet in netlist.items("sheet"):
-            if sheet.attributes["name"] == "/":
-                title_block = netlist.find("title_block", sheet)
-                for item in title_block.items:
-                    if item.name == "title":
-                        self.title = item.text if item.text is not None else ""
-                    elif item.name == "company":
-                        self.company = item.text if item.text is not None else ""
-                    elif item.name == "comment":
-                        if item.attributes["number"] == "1":
-                            self.number = item.attributes["value"]
-                        elif item.attributes["number"] == "2":
-                            self.developer = item.attributes["value"]
-                        elif item.attributes["number"] == "3":
-                            self.verifier = item.attributes["value"]
-                        elif item.attributes["number"] == "4":
-                            self.approver = item.attributes["value"]
-                        elif item.attributes["number"] == "6":
-                            self.inspector = item.attributes["value"]
-                break
-        for comp in netlist.items("comp"):
+        # Снимок параметров, действующий всё время жизни схемы
+        if settings is None:
+            settings = config.getSnapshot()
+        self.settings = settings
+
+        # Наименования групп kicadbom2spec:
+        # единственное -> множественное число и обратно
+        self.pluralTypeNames = {}
+        self.singularTypeNames = {}
+        if not headerOnly and self.settings.settings.compatibilityMode:
+            self.pluralTypeNames, self.singularTypeNames = \
+                config.getTypeNamesFromKicadbom2spec()
+
+        if headerOnly:
+            # Чтение файла прекращается сразу после основной надписи
+            if netlistName.endswith(".kicad_sch"):
+                titleBlock = kicadsch.readTitleBlock(netlistName)
+            else:
+                titleBlock = kicadnet.readTitleBlock(netlistName)
+            comps = []
+        elif netlistName.endswith(".kicad_sch"):
+            titleBlock, comps = kicadsch.readSchematicData(netlistName)
+        else:
+            titleBlock, comps = kicadnet.readNetlistData(
+                netlistName,
+                self.settings.settings.netlistCache
+            )
+        if titleBlock is not None:
+            for item in titleBlock.items:
+                if item.name == "title":
+                    self.title = item.text if item.text is not None else ""
+                elif item.name == "company":
+                    self.company = item.text if item.text is not None else ""
+                elif item.name == "comment":
+                    if item.attributes["number"] == "1":
+                        self.number = item.attributes["value"]
+                    elif item.attributes["number"] == "2":
+                        self.developer = item.attributes["value"]
+                    elif item.attributes["number"] == "3":
+                        self.verifier = item.attributes["value"]
+                    elif item.attributes["number"] == "4":
+                        self.approver = item.attributes["value"]
+                    elif item.attributes["number"] == "6":
+                        self.inspector = item.attributes["value"]
+        for comp in comps:
             component = Component(self)
             component.reference = comp.attributes["ref"]
             skip = False
@@ -726,36 +930,53 @@ class Schematic():
 
     def getGroupedComponents(self):
         """Вернуть компоненты, сгруппированные по типу."""
-        sortedComponents = sorted(
-            self.components,
-            key=lambda comp: comp.getBomValue("name")
-        )
-        sortedComponents = sorted(
-            sortedComponents,
-            key=lambda comp: comp.getBomValue("type")
-        )
-        sortedComponents = sorted(
-            sortedComponents,
-            key=lambda comp: "" if comp.getBomValue("type") else comp.getRefType()
-        ) # Компоненты без типа сортировать оп буквенной части обозначения
-        groups = []
-        compGroup = CompGroup(self)
-        compRange = CompRange(self)
-        excludedField = config.get("fields", "excluded")
+        # Компоненты без типа сортировать по буквенной части обозначения,
+        # затем по типу и наименованию.
+        def getCompKey(comp):
+            compType = comp.getBomValue("type")
+            return (
+                "" if compType else comp.getRefType(),
+                compType,
+                comp.getBomValue("name")
+            )
+
+        sortedComponents = sorted(self.components, key=getCompKey)
+        # Одинаковые компоненты объединяются в CompRange, а CompRange -- в
+        # группы по совпадению признаков, а не по соседству в списке.
+        # Порядок определяется первым вхождением в отсортированном списке.
+        compRanges = {}
+        excludedField = self.settings.fields.excluded
         for comp in sortedComponents:
             if excludedField and excludedField in comp.fields:
                 continue
-            if not compRange.append(comp):
-                if not compGroup.append(compRange):
-                    groups.append(compGroup)
-                    compGroup = CompGroup(self, compRange)
-                compRange = CompRange(self, comp)
-        if len(compRange) > 0:
-            if not compGroup.append(compRange):
-                groups.append(compGroup)
-                compGroup = CompGroup(self, compRange)
-        if len(compGroup) > 0:
-            groups.append(compGroup)
+            identity = comp.getIdentity()
+            if identity in compRanges:
+                compRanges[identity].add(comp)
+            else:
+                compRanges[identity] = CompRange(self, comp)
+        compGroups = {}
+        separateDocs = self.settings.doc.separateGroupForEachDoc
+        for identity, compRange in compRanges.items():
+            compType = identity[0]
+            refType = identity[-1]
+            if separateDocs:
+                # Если тип и документ не указаны, формировать группы
+                # на основе буквенной части обозначения.
+                compDoc = identity[2]
+                groupIdentity = (
+                    compType,
+                    compDoc,
+                    "" if compType or compDoc else refType
+                )
+            else:
+                # Если тип не указан, формировать группы на основе
+                # буквенной части обозначения.
+                groupIdentity = (compType, refType)
+            if groupIdentity in compGroups:
+                compGroups[groupIdentity].add(compRange)
+            else:
+                compGroups[groupIdentity] = CompGroup(self, compRange)
+        groups = list(compGroups.values())
 
         if not groups:
             return []
@@ -789,50 +1010,77 @@ class Schematic():
                     convData[index] = (isinstance(convData[index], str), convData[index])
             return convData
 
-        for index in range(len(groups)):
-            for sortLevel in "321":
-                sortField = config.get("comp sort fields", sortLevel)
+        # Заданные уровни сортировки, начиная с первого:
+        # (поле, по убыванию, тип данных, поле является шаблоном)
+        def getSortLevels(fields, orders, data):
+            levels = []
+            for sortLevel in "123":
+                sortField = fields[sortLevel]
                 if not sortField:
                     continue
-                sortOrder = config.get("comp sort order", sortLevel)
-                sortData = config.get("comp sort data", sortLevel)
-                if groups[index][0].formatPattern(sortField, check=True):
-                    groups[index].sort(
-                        key=lambda compRange: convertData(
-                            compRange.formatPattern(sortField),
-                            sortData
-                        ),
-                        reverse=(sortOrder == "По убыванию")
+                levels.append((
+                    sortField,
+                    orders[sortLevel] == "По убыванию",
+                    data[sortLevel],
+                    groups[0][0].formatPattern(sortField, check=True)
+                ))
+            return levels
+
+        compSortLevels = getSortLevels(
+            self.settings.compSortFields,
+            self.settings.compSortOrder,
+            self.settings.compSortData
+        )
+        groupSortLevels = getSortLevels(
+            self.settings.groupSortFields,
+            self.settings.groupSortOrder,
+            self.settings.groupSortData
+        )
+
+        # Для сортировки по числовому значению ("Значение!", "Число")
+        # абсолютные значения вычисляются сразу для всех компонентов схемы.
+        absValues = {}
+        for sortField, _, sortData, _ in compSortLevels:
+            if sortField == "Значение!" and sortData == "Число":
+                compRanges = [compRange for group in groups for compRange in group]
+                absValues = dict(zip(
+                    map(id, compRanges),
+                    parseValues(
+                        [compRange.getRefType() or "" for compRange in compRanges],
+                        [compRange.value for compRange in compRanges]
                     )
+                ))
+                break
+
+        # Составной ключ вычисляется один раз для каждого элемента и
+        # упорядочивает так же, как последовательные устойчивые сортировки
+        # по уровням "3", "2", "1".
+        def getCompRangeKey(compRange):
+            key = []
+            for sortField, descending, sortData, isPattern in compSortLevels:
+                if sortField == "Значение!" and sortData == "Число":
+                    value = absValues[id(compRange)]
+                elif isPattern:
+                    value = convertData(compRange.formatPattern(sortField), sortData)
                 else:
-                    groups[index].sort(
-                        key=lambda compRange: convertData(
-                            compRange.getFieldValue(sortField),
-                            sortData
-                        ),
-                        reverse=(sortOrder == "По убыванию")
-                    )
-        for sortLevel in "321":
-            sortField = config.get("group sort fields", sortLevel)
-            if not sortField:
-                continue
-            sortOrder = config.get("group sort order", sortLevel)
-            sortData = config.get("group sort data", sortLevel)
-            if groups[0][0].formatPattern(sortField, check=True):
-                groups.sort(
-                    key=lambda group: convertData(
-                        group[0].formatPattern(sortField),
-                        sortData
-                    ),
-                    reverse=(sortOrder == "По убыванию")
-                )
-            else:
-                groups.sort(
-                    key=lambda group: convertData(
-                        group[0].getFieldValue(sortField),
-                        sortData
-                    ),
-                    reverse=(sortOrder == "По убыванию")
-                )
+                    value = convertData(compRange.getFieldValue(sortField), sortData)
+                key.append(ReversedKey(value) if descending else value)
+            return tuple(key)
+
+        def getGroupKey(group):
+            key = []
+            for sortField, descending, sortData, isPattern in groupSortLevels:
+                if isPattern:
+                    value = convertData(group[0].formatPattern(sortField), sortData)
+                else:
+                    value = convertData(group[0].getFieldValue(sortField), sortData)
+                key.append(ReversedKey(value) if descending else value)
+            return tuple(key)
+
+        if compSortLevels:
+            for group in groups:
+                group.sort(key=getCompRangeKey)
+        if groupSortLevels:
+            groups.sort(key=getGroupKey)
 
         return groups
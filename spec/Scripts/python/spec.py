@@ -157,13 +157,15 @@ class SpecBuildingThread(threading.Thread):
         # --------------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
+            for _ in range(count):
+                writer.append(common.TableRow())
 
-        def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
+        def getFontSize(col, isTitle=False):
+            # Размер шрифта определяется стилем абзаца графы
+            # (для заголовка -- стилем заголовка).
+            if col == 4 and isTitle:
+                return fontSizes["Наименование (заголовок группы)"]
+            return fontSizes[common.TABLE_COLUMN_STYLES[col]]
 
         def isRowEmpty(row):
             lastCol = len(table.Rows[row].TableColumnSeparators)
@@ -177,19 +179,16 @@ class SpecBuildingThread(threading.Thread):
             return not dataIsPresent
 
         def fillSectionTitle(section):
-            doc.lockControllers()
-            cell = table.getCellByPosition(4, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            cellCursor.ParaStyleName = "Наименование (заголовок раздела)"
-            cell.String = section
-            gotoNextRow()
-            doc.unlockControllers()
+            row = common.TableRow(["", "", "", "", section], isTitle=True)
+            row.paraStyles[4] = "Наименование (заголовок раздела)"
+            writer.append(row)
 
         def fillRow(values, isTitle=False, posIncrement=0):
             colWidth = (5, 5, 7, 69, 62, 9, 21)
             extraRow = [""] * len(values)
-            extremeWidthFactor = config.getint("doc", "extreme width factor")
-            doc.lockControllers()
+            extremeWidthFactor = settings.doc.extremeWidthFactor
+            row = common.TableRow(values, isTitle)
+            values = row.values
             for col in range(len(values)):
                 if values[col] == "" and not (col == 2 and posIncrement != 0):
                     continue
@@ -200,7 +199,7 @@ class SpecBuildingThread(threading.Thread):
                     extraRow[col] = text[(lfPos + 1):]
                 widthFactor = textwidth.getWidthFactor(
                     values[col],
-                    getFontSize(col),
+                    getFontSize(col, isTitle),
                     colWidth[col]
                 )
                 if widthFactor < extremeWidthFactor:
@@ -219,42 +218,23 @@ class SpecBuildingThread(threading.Thread):
                         extraRow[col] = text[(pos + 1):] + '\n' + extraRow[col]
                         widthFactor = textwidth.getWidthFactor(
                             values[col],
-                            getFontSize(col),
+                            getFontSize(col, isTitle),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 4 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок группы)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
+                    row.paraStyles[col] = "Наименование (заголовок группы)"
+                row.widthFactors[col] = widthFactor
                 if col == 2 and posIncrement:
-                    if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
-                        posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
-                    else:
-                        posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
-                        posFieldMaster.SubType = 0
-                        posFieldMaster.Name = "Позиция"
-                    posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
-                    posField.Content = "Позиция+" + str(posIncrement)
-                    posField.attachTextFieldMaster(posFieldMaster)
-                    cell.Text.insertTextContent(cellCursor, posField, False)
-
+                    row.posCol = col
+                    row.posIncrement = posIncrement
                     self.currentPosition += posIncrement
-                    widthFactor = textwidth.getWidthFactor(
+                    row.posWidthFactor = textwidth.getWidthFactor(
                         str(self.currentPosition),
                         getFontSize(col),
                         colWidth[col]
                     )
-                    cellCursor.gotoStart(False)
-                    cellCursor.gotoEnd(True)
-                    cellCursor.CharScaleWidth = widthFactor
-                elif values[col]:
-                    cell.String = values[col]
-            doc.unlockControllers()
-
-            gotoNextRow()
+            writer.append(row)
+
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
@@ -262,7 +242,9 @@ class SpecBuildingThread(threading.Thread):
         # Начало построения таблицы
         # --------------------------------------------------------------------
         try:
-            schematic = common.getSchematicData()
+            # Параметры считываются один раз на всё построение
+            settings = config.getSnapshot()
+            schematic = common.getSchematicData(settings=settings)
             if schematic is None:
                 return
             doc = XSCRIPTCONTEXT.getDocument()
@@ -307,10 +289,10 @@ class SpecBuildingThread(threading.Thread):
                     return
             compGroups = schematic.getGroupedComponents()
             prevGroup = None
-            emptyRowsType = config.getint("doc", "empty rows between diff type")
+            emptyRowsType = settings.doc.emptyRowsBetweenDiffType
 
             progressTotal = 5 if self.update else 8
-            if config.getboolean("sections", "other parts"):
+            if settings.sections.otherParts:
                 for group in compGroups:
                     progressTotal += len(group)
             progressMessage = "Выполняется построение спецификации"
@@ -345,32 +327,37 @@ class SpecBuildingThread(threading.Thread):
                     cell.String = ""
                     cellCursor = cell.createTextCursor()
                     cellCursor.ParaStyleName = colStyles[colIndex]
-                # Если за прочими изделиями следует другой раздел,
-                # необходимо добавить пустую разделительную строку.
-                if otherPartsLastRow != tableRowCount - 1:
-                    table.Rows.insertByIndex(otherPartsFirstRow, 1)
                 self.currentRow = otherPartsFirstRow
 
                 progressDialog.stepUp()
 
-            # В процессе заполнения специф., после текущей строки всегда должна
-            # оставаться пустая строка с ненарушенным форматированием.
-            # На её основе будут создаваться новые строки.
+            # Текущая строка -- пустая строка с ненарушенным форматированием.
+            # На её основе будут созданы новые строки.
             # По окончанию, эта строка будет удалена.
-            table.Rows.insertByIndex(self.currentRow, 1)
+            # Строки специф. сначала формируются в памяти,
+            # а затем записываются в таблицу за один раз.
+            writer = common.TableWriter(table, self.currentRow)
+            # Новые строки создаются на основе строки-образца
+            # и имеют её высоту.
+            rowHeight = table.Rows[self.currentRow].Height
+            # Размеры шрифта граф считываются из стилей абзаца
+            # один раз за всё построение.
+            fontSizes = common.getFontSizes(
+                common.TABLE_COLUMN_STYLES + ("Наименование (заголовок группы)",)
+            )
 
             if not self.update:
-                if config.getboolean("sections", "documentation"):
-                    if not config.getboolean("doc", "prohibit empty rows at top"):
+                if settings.sections.documentation:
+                    if not settings.doc.prohibitEmptyRowsAtTop:
                         gotoNextRow()
                     fillSectionTitle("Документация")
 
-                    if config.getboolean("sections", "assembly drawing") \
-                        or config.getboolean("sections", "schematic") \
-                        or config.getboolean("sections", "index"):
+                    if settings.sections.assemblyDrawing \
+                        or settings.sections.schematic \
+                        or settings.sections.index:
                             gotoNextRow()
 
-                    if config.getboolean("sections", "assembly drawing"):
+                    if settings.sections.assemblyDrawing:
                         size, ref = common.getPcbInfo()
                         if not ref:
                             _, ref = common.getSchematicInfo()
@@ -387,14 +374,14 @@ class SpecBuildingThread(threading.Thread):
                             [size, "", "", ref, name]
                         )
 
-                    if config.getboolean("sections", "schematic"):
+                    if settings.sections.schematic:
                         size, ref = common.getSchematicInfo()
                         name = "Схема электрическая принципиальная"
                         fillRow(
                             [size, "", "", ref, name]
                         )
 
-                    if config.getboolean("sections", "index"):
+                    if settings.sections.index:
                         size, ref = common.getSchematicInfo()
                         size = "A4"
                         refParts = re.match(
@@ -408,7 +395,7 @@ class SpecBuildingThread(threading.Thread):
                             [size, "", "", ref, name]
                         )
 
-                    if config.getboolean("sections", "bom"):
+                    if settings.sections.bom:
                         size, ref = common.getSchematicInfo()
                         size = "A3"
                         refParts = re.match(
@@ -417,7 +404,7 @@ class SpecBuildingThread(threading.Thread):
                         )
                         if refParts is not None:
                             ref = refParts[1] + 'ВП'
-                        name = config.get("sections", "bom name")
+                        name = settings.sections.bomName
                         if not name:
                             name = "Ведомость покупных изделий"
                         fillRow(
@@ -426,11 +413,11 @@ class SpecBuildingThread(threading.Thread):
 
                 progressDialog.stepUp()
 
-                if config.getboolean("sections", "assembly units"):
+                if settings.sections.assemblyUnits:
                     gotoNextRow()
                     fillSectionTitle("Сборочные единицы")
 
-                    if config.getboolean("sections", "assembly pcb"):
+                    if settings.sections.assemblyPcb:
                         gotoNextRow()
                         name = "Плата печатная"
                         fillRow(
@@ -440,11 +427,11 @@ class SpecBuildingThread(threading.Thread):
 
                 progressDialog.stepUp()
 
-                if config.getboolean("sections", "details"):
+                if settings.sections.details:
                     gotoNextRow()
                     fillSectionTitle("Детали")
 
-                    if config.getboolean("sections", "pcb"):
+                    if settings.sections.pcb:
                         gotoNextRow()
                         name = "Плата печатная"
                         fillRow(
@@ -454,13 +441,13 @@ class SpecBuildingThread(threading.Thread):
 
                 progressDialog.stepUp()
 
-                if config.getboolean("sections", "standard parts"):
+                if settings.sections.standardParts:
                     gotoNextRow()
                     fillSectionTitle("Стандартные изделия")
 
                 progressDialog.stepUp()
 
-            if config.getboolean("sections", "other parts"):
+            if settings.sections.otherParts:
                 if not self.update:
                     gotoNextRow()
                 fillSectionTitle("Прочие изделия")
@@ -469,13 +456,11 @@ class SpecBuildingThread(threading.Thread):
                 for group in compGroups:
                     increment = 1
                     if prevGroup is not None:
-                        doc.lockControllers()
                         gotoNextRow(emptyRowsType)
-                        doc.unlockControllers()
-                        if config.getboolean("doc", "reserve position numbers"):
+                        if settings.doc.reservePositionNumbers:
                             increment += emptyRowsType
                     if len(group) == 1 \
-                        and not config.getboolean("doc", "every group has title"):
+                        and not settings.doc.everyGroupHasTitle:
                             compType = group[0].getSpecValue("type", singular=True)
                             compName = group[0].getSpecValue("name")
                             compDoc = group[0].getSpecValue("doc")
@@ -504,9 +489,9 @@ class SpecBuildingThread(threading.Thread):
                                     ["", "", "", "", title],
                                     isTitle=True
                                 )
-                        if config.getboolean("doc", "empty row after group title"):
+                        if settings.doc.emptyRowAfterGroupTitle:
                             gotoNextRow()
-                            if config.getboolean("doc", "reserve position numbers"):
+                            if settings.doc.reservePositionNumbers:
                                 increment += 1
                         for compRange in group:
                             compName = compRange.getSpecValue("name")
@@ -535,18 +520,33 @@ class SpecBuildingThread(threading.Thread):
                     prevGroup = group
 
             if not self.update:
-                if config.getboolean("sections", "materials"):
+                if settings.sections.materials:
                     gotoNextRow()
                     fillSectionTitle("Материалы")
                     gotoNextRow()
 
                 progressDialog.stepUp()
 
-            table.Rows.removeByIndex(self.currentRow, 2)
+            if not self.update:
+                # Строки размещаются по листам до записи в таблицу
+                common.paginateRows(
+                    writer.rows,
+                    self.currentRow,
+                    settings.doc.prohibitTitlesAtBottom,
+                    settings.doc.prohibitEmptyRowsAtTop
+                )
+            writer.flush()
+            # Если за прочими изделиями следует другой раздел, то
+            # строка-образец остаётся в качестве пустой разделительной строки.
+            if not self.update or otherPartsLastRow == tableRowCount - 1:
+                table.Rows.removeByIndex(writer.rowIndex, 1)
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "prohibit titles at bottom"):
+            # При обновлении раздела таблица содержит строки, которые не
+            # формировались заново, поэтому листы обрабатываются
+            # непосредственно в таблице.
+            if self.update and settings.doc.prohibitTitlesAtBottom:
                 _, firstRowCount, otherRowCount = common.getFirstPageInfo()
                 pos = firstRowCount
                 while pos < table.Rows.Count:
@@ -574,7 +574,7 @@ class SpecBuildingThread(threading.Thread):
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "prohibit empty rows at top"):
+            if self.update and settings.doc.prohibitEmptyRowsAtTop:
                 _, firstRowCount, otherRowCount = common.getFirstPageInfo()
                 pos = firstRowCount + 1
                 while pos < table.Rows.Count:
@@ -586,13 +586,17 @@ class SpecBuildingThread(threading.Thread):
 
             progressDialog.stepUp()
 
-            common.updateTableRowsHeight()
+            if self.update:
+                # Строки других разделов сохраняют свою высоту
+                common.updateTableRowsHeight()
+            else:
+                common.updateTableRowsHeight(rowHeight=rowHeight)
 
             progressDialog.stepUp()
 
-            if config.getboolean("doc", "append rev table"):
+            if settings.doc.appendRevTable:
                 pageCount = doc.CurrentController.PageCount
-                if pageCount > config.getint("doc", "pages rev table"):
+                if pageCount > settings.doc.pagesRevTable:
                     common.appendRevTable()
 
         except StopException: